@@ -0,0 +1,51 @@
+"""Local date and month of payments and transactions
+
+Revision ID: 2b7e9c4d6a10
+Revises: 8d3f5a2c1b47
+Create Date: 2026-10-18 11:03:19.804152
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "2b7e9c4d6a10"
+down_revision = "8d3f5a2c1b47"
+branch_labels = None
+depends_on = None
+
+TABLES = ("payment", "transaction")
+
+
+def upgrade():
+    for table in TABLES:
+        # Add the new columns as nullable
+        op.add_column(table, sa.Column("local_date", sa.Date(), nullable=True))
+        op.add_column(table, sa.Column("local_month", sa.Date(), nullable=True))
+
+        # Backfill from the stored instant converted to the row's own timezone, the
+        # same rule as `to_local_date`, which takes naive timestamps as UTC
+        op.execute(
+            f"""
+            UPDATE "{table}"
+            SET local_date = ("timestamp" AT TIME ZONE timezone)::date,
+                local_month = date_trunc('month', "timestamp" AT TIME ZONE timezone)::date
+            """
+        )
+
+        # Make the new columns non-nullable
+        op.alter_column(table, "local_date", nullable=False)
+        op.alter_column(table, "local_month", nullable=False)
+
+        # Add indexes
+        op.create_index(f"ix_{table}_local_date", table, ["local_date"])
+        op.create_index(f"ix_{table}_local_month", table, ["local_month"])
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index(f"ix_{table}_local_month", table_name=table)
+        op.drop_index(f"ix_{table}_local_date", table_name=table)
+        op.drop_column(table, "local_month")
+        op.drop_column(table, "local_date")
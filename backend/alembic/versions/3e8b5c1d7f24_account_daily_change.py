@@ -0,0 +1,42 @@
+"""Daily account balance changes
+
+Revision ID: 3e8b5c1d7f24
+Revises: 9a4d2e7f1c38
+Create Date: 2026-10-18 20:04:12.581306
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3e8b5c1d7f24"
+down_revision = "9a4d2e7f1c38"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "account_daily_change",
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("amount", sa.Numeric(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"]),
+        sa.PrimaryKeyConstraint("account_id", "day"),
+    )
+
+    # Seed from the existing transactions, as `kayman.cli rebuild-balance-history`
+    op.execute(
+        """
+        INSERT INTO account_daily_change (account_id, day, amount, count)
+        SELECT account_id, local_date, sum(amount), count(*)
+        FROM "transaction"
+        GROUP BY account_id, local_date
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("account_daily_change")
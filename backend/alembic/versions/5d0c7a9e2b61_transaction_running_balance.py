@@ -0,0 +1,52 @@
+"""Running balance of transactions
+
+Revision ID: 5d0c7a9e2b61
+Revises: 3e8b5c1d7f24
+Create Date: 2026-10-18 20:41:36.207915
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d0c7a9e2b61"
+down_revision = "3e8b5c1d7f24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_transaction_account_timestamp",
+        "transaction",
+        ["account_id", "timestamp", "id"],
+    )
+
+    # Add the new column as nullable
+    op.add_column(
+        "transaction", sa.Column("running_balance", sa.Numeric(), nullable=True)
+    )
+
+    # Backfill every account in one pass, in the order of the new index
+    op.execute(
+        """
+        UPDATE "transaction"
+        SET running_balance = running.balance
+        FROM (
+            SELECT id, sum(amount) OVER (
+                PARTITION BY account_id ORDER BY "timestamp", id
+            ) AS balance
+            FROM "transaction"
+        ) AS running
+        WHERE "transaction".id = running.id
+        """
+    )
+
+    # Make the new column non-nullable
+    op.alter_column("transaction", "running_balance", nullable=False)
+
+
+def downgrade():
+    op.drop_column("transaction", "running_balance")
+    op.drop_index("ix_transaction_account_timestamp", table_name="transaction")
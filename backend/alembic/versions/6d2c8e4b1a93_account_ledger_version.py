@@ -0,0 +1,34 @@
+"""Ledger versions of accounts, for incremental balance verification
+
+Revision ID: 6d2c8e4b1a93
+Revises: b3e1f9a7c5d2
+Create Date: 2026-10-18 23:12:40.528716
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6d2c8e4b1a93"
+down_revision = "b3e1f9a7c5d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "account",
+        sa.Column("ledger_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "account",
+        sa.Column(
+            "verified_version", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("account", "verified_version")
+    op.drop_column("account", "ledger_version")
@@ -0,0 +1,23 @@
+"""Payment timestamp index
+
+Revision ID: 8d3f5a2c1b47
+Revises: 0051bc20ef29
+Create Date: 2026-10-18 10:12:41.527303
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8d3f5a2c1b47"
+down_revision = "0051bc20ef29"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_payment_timestamp_id", "payment", ["timestamp", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_payment_timestamp_id", table_name="payment")
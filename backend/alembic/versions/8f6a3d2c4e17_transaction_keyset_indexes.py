@@ -0,0 +1,40 @@
+"""Keyset pagination indexes of transactions
+
+Revision ID: 8f6a3d2c4e17
+Revises: 5d0c7a9e2b61
+Create Date: 2026-10-18 21:15:52.730468
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8f6a3d2c4e17"
+down_revision = "5d0c7a9e2b61"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Pages of all accounts are ordered by (timestamp, id)
+    op.create_index("ix_transaction_timestamp_id", "transaction", ["timestamp", "id"])
+
+    # Pages of one account already use (account_id, timestamp, id), which now also
+    # covers the running balance for balance-as-of lookups
+    op.drop_index("ix_transaction_account_timestamp", table_name="transaction")
+    op.create_index(
+        "ix_transaction_account_timestamp",
+        "transaction",
+        ["account_id", "timestamp", "id"],
+        postgresql_include=["running_balance"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_transaction_account_timestamp", table_name="transaction")
+    op.create_index(
+        "ix_transaction_account_timestamp",
+        "transaction",
+        ["account_id", "timestamp", "id"],
+    )
+    op.drop_index("ix_transaction_timestamp_id", table_name="transaction")
@@ -0,0 +1,76 @@
+"""Monthly category and account flows
+
+Revision ID: 9a4d2e7f1c38
+Revises: 6c1f0e8b9a53
+Create Date: 2026-10-18 19:31:05.640912
+
+"""
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "9a4d2e7f1c38"
+down_revision = "6c1f0e8b9a53"
+branch_labels = None
+depends_on = None
+
+# Created along with the payment table
+payment_type_enum = postgresql.ENUM(
+    "Expense", "Income", "Transfer", "Exchange", name="paymenttype", create_type=False
+)
+
+
+def upgrade():
+    op.create_table(
+        "monthly_category_flow",
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("currency_code", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("type", payment_type_enum, nullable=False),
+        sa.Column("amount", sa.Numeric(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["category_id"], ["category.id"]),
+        sa.ForeignKeyConstraint(["currency_code"], ["currency.code"]),
+        sa.PrimaryKeyConstraint("month", "category_id", "currency_code", "type"),
+    )
+    op.create_table(
+        "monthly_account_flow",
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=False),
+        sa.Column("type", payment_type_enum, nullable=False),
+        sa.Column("amount", sa.Numeric(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"]),
+        sa.PrimaryKeyConstraint("month", "account_id", "type"),
+    )
+
+    # Seed from the existing payments, as `kayman.cli rebuild-monthly-flows` does
+    op.execute(
+        """
+        INSERT INTO monthly_category_flow
+            (month, category_id, currency_code, type, amount, count)
+        SELECT payment.local_month, payment_entry.category_id,
+            payment_entry.currency_code, payment.type,
+            sum(payment_entry.amount * payment_entry.quantity), count(*)
+        FROM payment_entry JOIN payment ON payment.id = payment_entry.payment_id
+        GROUP BY payment.local_month, payment_entry.category_id,
+            payment_entry.currency_code, payment.type
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO monthly_account_flow (month, account_id, type, amount, count)
+        SELECT "transaction".local_month, "transaction".account_id, payment.type,
+            sum("transaction".amount), count(*)
+        FROM "transaction" JOIN payment ON payment.id = "transaction".payment_id
+        GROUP BY "transaction".local_month, "transaction".account_id, payment.type
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("monthly_account_flow")
+    op.drop_table("monthly_category_flow")
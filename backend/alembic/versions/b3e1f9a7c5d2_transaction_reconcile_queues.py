@@ -0,0 +1,36 @@
+"""Partial indexes of unreconciled transactions
+
+Revision ID: b3e1f9a7c5d2
+Revises: 8f6a3d2c4e17
+Create Date: 2026-10-18 21:48:07.119534
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b3e1f9a7c5d2"
+down_revision = "8f6a3d2c4e17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_transaction_unreconciled",
+        "transaction",
+        ["account_id", "timestamp", "id"],
+        postgresql_where=sa.text("reconcile = false"),
+    )
+    op.create_index(
+        "ix_transaction_psp_unreconciled",
+        "transaction",
+        ["psp_id", "timestamp", "id"],
+        postgresql_where=sa.text("psp_id IS NOT NULL AND psp_reconcile = false"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_transaction_psp_unreconciled", table_name="transaction")
+    op.drop_index("ix_transaction_unreconciled", table_name="transaction")
@@ -0,0 +1,126 @@
+"""
+Concurrent balance updates on a single account
+
+Compares the previous path of update_account_balances (SELECT ... FOR UPDATE,
+Python-side addition, flush, refresh and re-read) with the UPDATE ... RETURNING path,
+while many workers add to the balance of the same account.
+
+Tables are created in and dropped from the given database, point it to a scratch one.
+It must be PostgreSQL: SQLite locks the whole database for each writer, so its
+numbers say nothing about row lock contention between concurrent writers.
+
+Usage: python -m benchmarks.account_balances postgresql://... [--workers 32]
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from sqlalchemy import Engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from kayman.crud.account import read_accounts, update_account_balances
+from kayman.schemas import Account, Currency
+
+UpdateBalances = Callable[[Session, dict[int, Decimal]], Sequence[Account]]
+
+
+def legacy_update_account_balances(
+    session: Session, account_amounts: dict[int, Decimal]
+) -> Sequence[Account]:
+    """update_account_balances(commit=False) before the set-based UPDATE"""
+    account_ids = list(account_amounts.keys())
+    db_accounts = read_accounts(session, account_ids, for_update=True)
+    id_to_index = {account.id: index for index, account in enumerate(db_accounts)}
+    for account_id, amount in account_amounts.items():
+        db_accounts[id_to_index[account_id]].balance += amount
+    session.add_all(db_accounts)
+    session.flush()
+    for account in db_accounts:
+        session.refresh(account)
+    return read_accounts(session, account_ids)
+
+
+def run(
+    engine: Engine, update: UpdateBalances, workers: int, updates: int
+) -> tuple[float, list[float]]:
+    """Return the number of committed updates per second, and their latencies"""
+    with Session(engine) as session:
+        account = session.get_one(Account, 1)
+        account.balance = Decimal(0)
+        session.commit()
+
+    latencies: list[float] = []
+
+    def worker() -> None:
+        with Session(engine) as session:
+            for _ in range(updates):
+                start = time.perf_counter()
+                update(session, {1: Decimal(1)})
+                session.commit()
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(worker) for _ in range(workers)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    with Session(engine) as session:
+        balance = session.get_one(Account, 1).balance
+    assert balance == workers * updates, f"Lost updates, balance is {balance}"
+    return workers * updates / elapsed, latencies
+
+
+def describe(label: str, throughput: float, latencies: list[float]) -> None:
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:28} {throughput:10.1f} updates/s, "
+        f"p50 {percentiles[49] * 1e3:7.1f} ms, p99 {percentiles[98] * 1e3:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url", help="SQLAlchemy URL of a scratch database")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--updates", type=int, default=100, help="Per worker")
+    args = parser.parse_args()
+    if not args.url.startswith("postgresql"):
+        parser.error("url must be a PostgreSQL database")
+
+    engine = create_engine(
+        args.url, pool_size=args.workers, max_overflow=0, pool_timeout=300
+    )
+    SQLModel.metadata.create_all(engine)
+    try:
+        with Session(engine) as session:
+            session.add(Currency(code="BCH", name="Benchmark", symbol="B"))
+            session.add(Account(id=1, name="Benchmark", currency_code="BCH", balance=0))
+            session.commit()
+
+        legacy, legacy_latencies = run(
+            engine, legacy_update_account_balances, args.workers, args.updates
+        )
+        current, current_latencies = run(
+            engine,
+            lambda session, amounts: update_account_balances(
+                session, amounts, commit=False
+            ),
+            args.workers,
+            args.updates,
+        )
+    finally:
+        SQLModel.metadata.drop_all(engine)
+
+    print(f"{args.workers} workers x {args.updates} updates on one account")
+    describe("SELECT FOR UPDATE + refresh:", legacy, legacy_latencies)
+    describe("UPDATE ... RETURNING:", current, current_latencies)
+    print(f"{'Speedup:':28} {current / legacy:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
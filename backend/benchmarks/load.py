@@ -0,0 +1,136 @@
+"""
+Request latency of running servers under many concurrent clients
+
+Every client sends its requests one after another, all clients at once, while
+writers post a payment batch over and over. The same load is run against each
+server in turn and reported side by side, to compare a server doing the batch on
+the event loop through `run_sync` (e.g. started from a worktree of the revision
+before heavy writes moved to the threadpool) with one doing it in the threadpool
+through `get_sync_session`. With the batch on the event loop, every other request
+waits for it.
+
+The batch file holds a JSON list of payments as posted to /payments/batch, for
+accounts and categories of the database the servers run on. Point them to a
+scratch one, every batch is stored.
+
+Usage: python -m benchmarks.load async=http://localhost:8000 \\
+    sync=http://localhost:8001 --token ... [--path /payments] [--clients 200] \\
+    [--requests 20] [--batch payments.json] [--writers 4]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+
+class Result:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.elapsed = 0.0
+        self.batches = 0
+
+
+async def client(
+    http: httpx.AsyncClient, path: str, requests: int, latencies: list[float]
+) -> None:
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await http.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def writer(
+    http: httpx.AsyncClient, batch: list[Any], done: asyncio.Event, result: Result
+) -> None:
+    while not done.is_set():
+        response = await http.post("/payments/batch", json=batch)
+        response.raise_for_status()
+        result.batches += 1
+
+
+async def run(
+    url: str,
+    token: str,
+    path: str,
+    clients: int,
+    requests: int,
+    batch: list[Any] | None,
+    writers: int,
+) -> Result:
+    result = Result()
+    limits = httpx.Limits(max_connections=clients + writers)
+    async with httpx.AsyncClient(
+        base_url=url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=None,
+    ) as http:
+        await http.get(path)  # Warm up
+        done = asyncio.Event()
+        writing = (
+            [
+                asyncio.create_task(writer(http, batch, done, result))
+                for _ in range(writers)
+            ]
+            if batch is not None
+            else []
+        )
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(client(http, path, requests, result.latencies) for _ in range(clients))
+        )
+        result.elapsed = time.perf_counter() - start
+        done.set()
+        await asyncio.gather(*writing)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("servers", nargs="+", metavar="label=url")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--path", default="/payments")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--batch", type=Path)
+    parser.add_argument("--writers", type=int, default=4)
+    args = parser.parse_args()
+
+    batch = json.loads(args.batch.read_text()) if args.batch else None
+    results: dict[str, Result] = {}
+    for server in args.servers:
+        label, _, url = server.rpartition("=")
+        results[label or url] = asyncio.run(
+            run(
+                url,
+                args.token,
+                args.path,
+                args.clients,
+                args.requests,
+                batch,
+                args.writers,
+            )
+        )
+
+    print(f"{args.clients} clients x {args.requests} GET {args.path}", end="")
+    print(f", {args.writers} batch writers" if batch is not None else "")
+    columns = f"{'requests/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'batches/s':>9}"
+    print(f"{'server':10} {columns}")
+    for label, result in results.items():
+        percentiles = statistics.quantiles(result.latencies, n=100)
+        print(
+            f"{label:10} {len(result.latencies) / result.elapsed:10.1f} "
+            f"{percentiles[49] * 1e3:8.1f} {percentiles[98] * 1e3:8.1f} "
+            f"{result.batches / result.elapsed:9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
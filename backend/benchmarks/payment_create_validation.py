@@ -0,0 +1,93 @@
+"""
+Per-entry CPU cost of building rows on the payment create path
+
+Compares validating every entry and transaction twice, as POST /payments used to,
+with building the rows once from the already validated request.
+
+Usage: python -m benchmarks.payment_create_validation [--entries 500]
+"""
+
+import argparse
+import timeit
+from functools import partial
+
+from kayman.logics.payment import build_payment_rows
+from kayman.schemas.api_models import PaymentCreateDetailed
+from kayman.schemas.payment import PaymentEntry, PaymentEntryBase
+from kayman.schemas.transaction import Transaction, TransactionBase
+
+
+def legacy_build_payment_rows(
+    payment_id: int, details: PaymentCreateDetailed
+) -> tuple[list[PaymentEntry], list[Transaction]]:
+    """Router model_validate followed by the CRUD model_validate"""
+    entries = [
+        PaymentEntry.model_validate(
+            PaymentEntryBase.model_validate(
+                entry, update={"payment_id": payment_id, "index": index}
+            )
+        )
+        for index, entry in enumerate(details.entries)
+    ]
+    transactions = [
+        Transaction.model_validate(
+            TransactionBase.model_validate(
+                transaction, update={"payment_id": payment_id, "index": index}
+            )
+        )
+        for index, transaction in enumerate(details.transactions)
+    ]
+    return entries, transactions
+
+
+def build_details(entries: int) -> PaymentCreateDetailed:
+    timestamp = "2022-09-08T08:07:08"
+    return PaymentCreateDetailed.model_validate(
+        {
+            "payment": {
+                "type": "Expense",
+                "timestamp": timestamp,
+                "timezone": "Asia/Taipei",
+            },
+            "entries": [
+                {
+                    "category_id": 1,
+                    "amount": "12.5",
+                    "quantity": 2,
+                    "currency_code": "TWD",
+                    "description": f"Entry {index}",
+                }
+                for index in range(entries)
+            ],
+            "transactions": [
+                {
+                    "account_id": 1,
+                    "amount": str(-25 * entries),
+                    "timestamp": timestamp,
+                    "timezone": "Asia/Taipei",
+                }
+            ],
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    details = build_details(args.entries)
+    rows = args.entries + len(details.transactions)
+    for name, build in (
+        ("Validate twice", legacy_build_payment_rows),
+        ("Build once", build_payment_rows),
+    ):
+        seconds = min(
+            timeit.repeat(partial(build, 1, details), number=1, repeat=args.repeat)
+        )
+        print(f"{name:15} {seconds / rows * 1e6:8.2f} us per row")
+
+
+if __name__ == "__main__":
+    main()
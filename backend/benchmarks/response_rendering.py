@@ -0,0 +1,125 @@
+"""
+Rendering cost of list responses with the default response class
+
+Renders 10k PaymentReadDetailed both as FastAPI hands them to the response class
+(already encoded by the response model) and as raw models, which go through the
+`default` hook. The simplejson renderer K used before is kept here for comparison,
+and both renderers must produce the same bytes for response model output.
+
+Raw models differ in one way: orjson renders plain enums by value, where
+simplejson fell back to str(), e.g. "PaymentType.Expense".
+
+Usage: python -m benchmarks.response_rendering [--payments 10000]
+"""
+
+import argparse
+import timeit
+from collections.abc import Callable
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import simplejson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+
+from kayman.schemas.api_models import PaymentReadDetailed
+from kayman.util import KustomJSONResponse
+
+
+def legacy_handle_special_types(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, ZoneInfo):
+        return str(obj)
+    return str(obj)
+
+
+def legacy_render(content: Any) -> bytes:
+    return simplejson.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=legacy_handle_special_types,
+        use_decimal=True,
+    ).encode("utf-8")
+
+
+def build_payments(payments: int) -> list[PaymentReadDetailed]:
+    timestamp = datetime(2022, 9, 8, 8, 7, 8, 123456)
+    return [
+        PaymentReadDetailed.model_validate(
+            {
+                "id": index,
+                "type": "Expense",
+                "timestamp": timestamp,
+                "timezone": "Asia/Taipei",
+                "description": f"Payment {index} — 午餐",
+                "entries": [
+                    {
+                        "id": index * 2 + entry,
+                        "payment_id": index,
+                        "index": entry,
+                        "category_id": 1,
+                        "amount": Decimal("12.3456789012"),
+                        "quantity": 2,
+                        "currency_code": "TWD",
+                        "description": None,
+                    }
+                    for entry in range(2)
+                ],
+                "transactions": [
+                    {
+                        "id": index,
+                        "payment_id": index,
+                        "index": 0,
+                        "account_id": 1,
+                        "amount": Decimal("-24.6913578024"),
+                        "timestamp": timestamp,
+                        "timezone": "Asia/Taipei",
+                        "running_balance": Decimal("-24.6913578024") * (index + 1),
+                    }
+                ],
+            }
+        )
+        for index in range(payments)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payments", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payments = build_payments(args.payments)
+    # What FastAPI passes to the response class after applying the response model
+    adapter: TypeAdapter[list[PaymentReadDetailed]] = TypeAdapter(
+        list[PaymentReadDetailed]
+    )
+    encoded = jsonable_encoder(adapter.dump_python(payments, mode="json"))
+    render = KustomJSONResponse(None).render
+
+    renderers: list[tuple[str, Callable[[Any], bytes]]] = [
+        ("simplejson", legacy_render),
+        ("orjson", render),
+    ]
+    if len({renderer(encoded) for _, renderer in renderers}) != 1:
+        raise SystemExit("Renderers produced different output")
+
+    for label, content in (("Response model", encoded), ("Raw models", payments)):
+        for name, renderer in renderers:
+            seconds = min(
+                timeit.repeat(partial(renderer, content), number=1, repeat=args.repeat)
+            )
+            print(f"{label:15} {name:11} {seconds * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Import time and time to first request of the application
+
+Each run is a fresh interpreter, as a booting worker. Reports the median time to
+import kayman.main and to serve the first request, then the modules with the
+largest cumulative import time from `python -X importtime`.
+
+The first request is served in process without a database, so the path should not
+need one (the default / redirect, or /openapi.json to include document generation).
+
+Usage: python -m benchmarks.startup [--path /openapi.json] [--runs 10] [--top 20]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+FIRST_REQUEST = """
+import time
+start = time.perf_counter()
+from kayman.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    requested = time.perf_counter()
+    client.get({path!r}, follow_redirects=False)
+    served = time.perf_counter()
+print(imported - start, served - requested)
+"""
+
+
+def measure(path: str, runs: int) -> tuple[float, float]:
+    """Return the median seconds to import the application and serve one request"""
+    imports, requests = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", FIRST_REQUEST.format(path=path)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        import_seconds, request_seconds = output.split()[-2:]
+        imports.append(float(import_seconds))
+        requests.append(float(request_seconds))
+    return statistics.median(imports), statistics.median(requests)
+
+
+def import_times() -> list[tuple[int, int, str]]:
+    """Return (self µs, cumulative µs, module) of every module kayman.main imports"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import kayman.main"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, module = line.removeprefix("import time:").split("|")
+        times.append((int(own), int(cumulative), module.rstrip()))
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    imported, served = measure(args.path, args.runs)
+    print(f"Import kayman.main  {imported * 1e3:8.1f} ms")
+    print(f"First request       {served * 1e3:8.1f} ms")
+    print()
+    print(f"{'self ms':>8} {'cumul ms':>9}  module")
+    times = sorted(import_times(), key=lambda t: t[1], reverse=True)
+    for own, cumulative, module in times[: args.top]:
+        print(f"{own / 1e3:8.1f} {cumulative / 1e3:9.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
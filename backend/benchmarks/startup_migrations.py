@@ -0,0 +1,71 @@
+"""
+Cold-start cost of the startup migration check on an up-to-date database
+
+Each run is a fresh interpreter, as a booting worker. Compares running the Alembic
+upgrade command, as startup used to, with alembic_upgrade, which returns after
+comparing the stored revision with the script heads.
+
+The database must already be at the head revision.
+
+Usage: python -m benchmarks.startup_migrations postgresql://... [--runs 10]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+LEGACY = """
+import time
+from sqlalchemy import create_engine
+from alembic import command
+from alembic.config import Config
+engine = create_engine({url!r})
+start = time.perf_counter()
+alembic_cfg = Config("alembic.ini")
+with engine.begin() as connection:
+    alembic_cfg.attributes["connection"] = connection
+    command.upgrade(alembic_cfg, "head")
+print(time.perf_counter() - start)
+"""
+
+CURRENT = """
+import time
+from sqlalchemy import create_engine
+from kayman.core.db import alembic_upgrade
+engine = create_engine({url!r})
+start = time.perf_counter()
+alembic_upgrade(engine)
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, url: str, runs: int) -> float:
+    """Return the median seconds of the startup migration step"""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code.format(url=url)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        timings.append(float(output.split()[-1]))
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    legacy = measure(LEGACY, args.url, args.runs)
+    current = measure(CURRENT, args.url, args.runs)
+    print(f"Upgrade command     {legacy * 1e3:8.1f} ms")
+    print(f"Compare revisions   {current * 1e3:8.1f} ms")
+    print(f"Saved               {(legacy - current) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Latency of transaction pages as one account grows
+
+Grows the history of a single account to each of the given sizes, and times
+reading a page of its transactions at the head, the middle and the tail of the
+history with a keyset cursor. Reading the tail with OFFSET is timed as well for
+comparison.
+
+Tables are created in and dropped from the given database, point it to a scratch one.
+
+Usage: python -m benchmarks.transaction_pages postgresql://... \\
+    [--sizes 10000 100000 1000000] [--limit 100]
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import Engine, insert, text
+from sqlmodel import Session, SQLModel, create_engine
+
+from kayman.crud.transaction import get_transactions, select_transactions
+from kayman.schemas import Account, Currency, Payment, Transaction
+from kayman.schemas.payment import PaymentType
+
+INSERT_BATCH_SIZE = 10000
+REPEATS = 20
+EPOCH = datetime(2000, 1, 1)
+
+
+def grow(engine: Engine, start: int, stop: int) -> None:
+    """Add transactions number `start` to `stop` to the account, one minute apart"""
+    with engine.begin() as connection:
+        for batch_start in range(start, stop, INSERT_BATCH_SIZE):
+            rows = []
+            for index in range(batch_start, min(batch_start + INSERT_BATCH_SIZE, stop)):
+                timestamp = EPOCH + timedelta(minutes=index)
+                rows.append(
+                    {
+                        "account_id": 1,
+                        "payment_id": 1,
+                        "index": index,
+                        "amount": Decimal(1),
+                        "timestamp": timestamp,
+                        "timezone": "UTC",
+                        "local_date": timestamp.date(),
+                        "local_month": timestamp.date().replace(day=1),
+                        "running_balance": Decimal(index + 1),
+                        "reconcile": False,
+                        "psp_reconcile": False,
+                    }
+                )
+            connection.execute(insert(Transaction), rows)
+        if engine.dialect.name == "postgresql":
+            connection.execute(text('ANALYZE "transaction"'))
+
+
+def median_ms(read: Callable[[Session], object], engine: Engine) -> float:
+    latencies = []
+    with Session(engine) as session:
+        read(session)  # Warm up
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            read(session)
+            latencies.append(time.perf_counter() - start)
+            session.expunge_all()
+    return statistics.median(latencies) * 1000
+
+
+def measure(engine: Engine, size: int, limit: int) -> dict[str, float]:
+    def page_after(index: int) -> Callable[[Session], object]:
+        after = (EPOCH + timedelta(minutes=index), index + 1) if index >= 0 else None
+        return lambda session: get_transactions(
+            session, account_id=1, after=after, limit=limit + 1
+        )
+
+    def tail_with_offset(session: Session) -> object:
+        statement = select_transactions(1).offset(size - limit).limit(limit)
+        return session.exec(statement).all()
+
+    return {
+        "head": median_ms(page_after(-1), engine),
+        "middle": median_ms(page_after(size // 2), engine),
+        "tail": median_ms(page_after(size - limit - 1), engine),
+        "offset tail": median_ms(tail_with_offset, engine),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url", help="SQLAlchemy URL of a scratch database")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--limit", type=int, default=100, help="Rows per page")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    SQLModel.metadata.create_all(engine)
+    try:
+        with Session(engine) as session:
+            session.add(Currency(code="BCH", name="Benchmark", symbol="B"))
+            session.add(Account(id=1, name="Benchmark", currency_code="BCH", balance=0))
+            session.add(
+                Payment(id=1, type=PaymentType.Income, timestamp=EPOCH, timezone="UTC")
+            )
+            session.commit()
+
+        results = {}
+        size = 0
+        for target in sorted(args.sizes):
+            grow(engine, size, target)
+            size = target
+            results[size] = measure(engine, size, args.limit)
+    finally:
+        SQLModel.metadata.drop_all(engine)
+
+    columns = ["head", "middle", "tail", "offset tail"]
+    print(f"Median ms per page of {args.limit} transactions of one account")
+    print(f"{'rows':>10}" + "".join(f"{column:>14}" for column in columns))
+    for size, latencies in results.items():
+        print(f"{size:>10}" + "".join(f"{latencies[c]:>14.2f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime, timedelta
+from functools import cache
 from pathlib import Path
 from typing import Any
 
@@ -14,22 +15,29 @@ from kayman.schemas.clients import Client
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 CLIENTS_PATH = Path(__file__).parent.parent / "instance/clients.json"
-try:
-    with open(CLIENTS_PATH) as f:
-        raw_clients = json.load(f)
-except FileNotFoundError:
-    logger.warning(
-        f"Client file not configured, please configure one at {CLIENTS_PATH}"
-    )
-    raw_clients = {}
-CLIENTS = {client["name"]: Client(**client) for client in raw_clients}
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+@cache
+def get_clients() -> dict[str, Client]:
+    """Clients from the client file, read on first use rather than on import"""
+    try:
+        with open(CLIENTS_PATH) as f:
+            raw_clients = json.load(f)
+    except FileNotFoundError:
+        logger.warning(
+            f"Client file not configured, please configure one at {CLIENTS_PATH}"
+        )
+        raw_clients = {}
+    return {client["name"]: Client(**client) for client in raw_clients}
+
+
 def authenticate_client(
-    name: str, password: str, clients: dict[str, Client] = CLIENTS
+    name: str, password: str, clients: dict[str, Client] | None = None
 ) -> Client | None:
+    if clients is None:
+        clients = get_clients()
     client = clients.get(name)
     if not client:
         return None
@@ -61,7 +69,7 @@ async def get_client(token: str = Depends(oauth2_scheme)) -> Client:
             raise credentials_exception
     except JWTError as err:
         raise credentials_exception from err
-    client = CLIENTS.get(client_name)
+    client = get_clients().get(client_name)
     if not client:
         raise credentials_exception
     return client
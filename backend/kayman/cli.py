@@ -0,0 +1,144 @@
+"""
+Command line tools of Kayman
+
+Run from the backend directory with `python -m kayman.cli <command>`.
+"""
+
+import argparse
+import json
+from collections.abc import Sequence
+
+from loguru import logger
+from sqlmodel import Session
+
+from kayman.core.db import engine
+from kayman.crud.account_balance import (
+    rebuild_account_balances,
+    rebuild_daily_changes,
+    verify_account_balances,
+)
+from kayman.crud.monthly_flow import rebuild_monthly_flows
+from kayman.crud.transaction import rebuild_running_balances
+from kayman.logics.payment import IMPORT_CHUNK_SIZE, import_payments
+from kayman.schemas.api_models import PaymentImportProgress
+
+
+def import_payments_command(args: argparse.Namespace) -> None:
+    progress = PaymentImportProgress()
+    with args.file as file, Session(engine) as session:
+        for progress in import_payments(session, file, chunk_size=args.chunk_size):
+            logger.info(
+                f"Processed {progress.lines} lines, imported {progress.imported} "
+                f"payments, {progress.failed} failed"
+            )
+    for error in progress.errors:
+        logger.warning(f"Line {error.line}: {error.detail}")
+    if progress.failed > len(progress.errors):
+        logger.warning(f"{progress.failed - len(progress.errors)} more errors")
+    logger.info(
+        f"Done, imported {progress.imported} payments, {progress.failed} failed"
+    )
+
+
+def rebuild_monthly_flows_command(_args: argparse.Namespace) -> None:
+    with Session(engine) as session:
+        rebuild_monthly_flows(session)
+    logger.info("Rebuilt monthly flows")
+
+
+def rebuild_balance_history_command(_args: argparse.Namespace) -> None:
+    with Session(engine) as session:
+        rebuild_daily_changes(session)
+    logger.info("Rebuilt daily balance changes")
+
+
+def verify_balances_command(args: argparse.Namespace) -> None:
+    with Session(engine) as session:
+        report = verify_account_balances(session, args.pending, commit=True)
+        for drift in report.drifts:
+            logger.warning(
+                f"Account {drift.account_id}: balance {drift.balance}, "
+                f"transactions sum to {drift.ledger_balance}"
+            )
+        logger.info(f"Verified {report.checked} accounts, {len(report.drifts)} drifted")
+
+        if args.rebuild:
+            rebuild_account_balances(session, commit=False)
+            rebuild_running_balances(session)
+            logger.info("Rebuilt account and running balances from transactions")
+
+
+def openapi_command(args: argparse.Namespace) -> None:
+    # The application is imported here, it is only needed to build the document
+    from kayman.main import app
+    from kayman.util import build_openapi, convert_openapi
+
+    with args.output as output:
+        json.dump(convert_openapi(build_openapi(app)), output)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="kayman")
+    commands = parser.add_subparsers(title="commands", required=True)
+
+    import_parser = commands.add_parser(
+        "import-payments", help="Import payments from a newline-delimited JSON file"
+    )
+    import_parser.add_argument(
+        "file",
+        type=argparse.FileType("rb"),
+        help="Path to the file, or - to read from stdin",
+    )
+    import_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=IMPORT_CHUNK_SIZE,
+        help="Number of payments to commit at once",
+    )
+    import_parser.set_defaults(func=import_payments_command)
+
+    rebuild_parser = commands.add_parser(
+        "rebuild-monthly-flows", help="Recompute the monthly flows from all payments"
+    )
+    rebuild_parser.set_defaults(func=rebuild_monthly_flows_command)
+
+    history_parser = commands.add_parser(
+        "rebuild-balance-history",
+        help="Recompute the daily balance changes from all transactions",
+    )
+    history_parser.set_defaults(func=rebuild_balance_history_command)
+
+    verify_parser = commands.add_parser(
+        "verify-balances",
+        help="Compare account balances with the sum of their transactions",
+    )
+    verify_parser.add_argument(
+        "--pending",
+        action="store_true",
+        help="Only verify accounts whose balance changed since they last verified",
+    )
+    verify_parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Then set all balances from the transactions",
+    )
+    verify_parser.set_defaults(func=verify_balances_command)
+
+    openapi_parser = commands.add_parser(
+        "openapi", help="Build the OpenAPI document, as served by OPENAPI_FILE"
+    )
+    openapi_parser.add_argument(
+        "output",
+        nargs="?",
+        type=argparse.FileType("w"),
+        default="-",
+        help="Path to write the document to, defaults to stdout",
+    )
+    openapi_parser.set_defaults(func=openapi_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
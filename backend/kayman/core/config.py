@@ -1,7 +1,7 @@
 import secrets
 from typing import Literal
 
-from pydantic import PostgresDsn, computed_field
+from pydantic import FilePath, PostgresDsn, computed_field
 from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,11 +16,26 @@ class Settings(BaseSettings):
     ENVIRONMENT: Literal["local", "staging", "production"] = "production"
 
     PROJECT_NAME: str = "Kayman"
+    # OpenAPI document built by `python -m kayman.cli openapi`, served as is
+    OPENAPI_FILE: FilePath | None = None
     POSTGRES_HOST: str = "kayman-db"  # Default Docker Compose service name
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str = "kayman"
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str = "kayman"
+    # Connection pool, see sqlalchemy.create_engine for details
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30  # Seconds to wait for a connection
+    POSTGRES_POOL_RECYCLE: int = -1  # Seconds before a connection is replaced
+    POSTGRES_POOL_PRE_PING: bool = False
+    # Optional read replica of the same database, serving GET requests
+    POSTGRES_REPLICA_HOST: str | None = None
+    POSTGRES_REPLICA_PORT: int | None = None  # Defaults to POSTGRES_PORT
+    POSTGRES_REPLICA_LAG: int = 5  # Seconds a client reads the primary after writing
+    # Seconds a process keeps its category tree, bounding how stale it can be after
+    # another process changes categories
+    CATEGORY_TREE_TTL: float = 60
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -36,5 +51,45 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> PostgresDsn:
+        return MultiHostUrl.build(  # type: ignore
+            scheme="postgresql+asyncpg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_HOST,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_DATABASE_URI(self) -> PostgresDsn | None:
+        if not self.POSTGRES_REPLICA_HOST:
+            return None
+        return MultiHostUrl.build(  # type: ignore
+            scheme="postgresql",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_REPLICA_HOST,
+            port=self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_REPLICA_DATABASE_URI(self) -> PostgresDsn | None:
+        if not self.POSTGRES_REPLICA_HOST:
+            return None
+        return MultiHostUrl.build(  # type: ignore
+            scheme="postgresql+asyncpg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_REPLICA_HOST,
+            port=self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
 
 settings = Settings()  # type: ignore
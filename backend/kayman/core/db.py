@@ -1,25 +1,192 @@
-from collections.abc import Generator
-from typing import Any
+from collections.abc import AsyncGenerator, Callable, Generator
+from typing import Any, Concatenate, ParamSpec, TypeVar
 
+from fastapi import Request, Response
 from loguru import logger
-from sqlmodel import Session, create_engine
+from sqlalchemy import Connection, Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from alembic import command
-from alembic.config import Config
 from kayman.core.config import settings
+from kayman.core.pool import StatsAsyncAdaptedQueuePool, attach_pool_stats
 
+P = ParamSpec("P")
+T = TypeVar("T")
+
+POOL_OPTIONS: dict[str, Any] = {
+    "pool_size": settings.POSTGRES_POOL_SIZE,
+    "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+    "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+    "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+    "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+}
+
+# Sessions run in UTC, so naive timestamps are taken as UTC by the database as well
+SYNC_CONNECT_ARGS = {"options": "-c timezone=UTC"}
+ASYNC_CONNECT_ARGS = {"server_settings": {"timezone": "UTC"}}
+
+# Used outside of requests, e.g. by the command line interface, and by requests
+# doing CPU-bound work in the threadpool
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
     echo=settings.ENVIRONMENT == "local",
+    connect_args=SYNC_CONNECT_ARGS,
+    **POOL_OPTIONS,
+)
+replica_engine = (
+    create_engine(
+        str(settings.SQLALCHEMY_REPLICA_DATABASE_URI),
+        echo=settings.ENVIRONMENT == "local",
+        connect_args=SYNC_CONNECT_ARGS,
+        **POOL_OPTIONS,
+    )
+    if settings.SQLALCHEMY_REPLICA_DATABASE_URI
+    else None
+)
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
+    echo=settings.ENVIRONMENT == "local",
+    poolclass=StatsAsyncAdaptedQueuePool,
+    connect_args=ASYNC_CONNECT_ARGS,
+    **POOL_OPTIONS,
+)
+async_pool_stats = attach_pool_stats(async_engine.sync_engine)
+async_replica_engine = (
+    create_async_engine(
+        str(settings.SQLALCHEMY_ASYNC_REPLICA_DATABASE_URI),
+        echo=settings.ENVIRONMENT == "local",
+        connect_args=ASYNC_CONNECT_ARGS,
+        **POOL_OPTIONS,
+    )
+    if settings.SQLALCHEMY_ASYNC_REPLICA_DATABASE_URI
+    else None
 )
 
+# Advisory lock key taken by the worker running migrations, "kayman" in ASCII
+MIGRATION_LOCK_ID = 0x6B61796D616E
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+READ_PRIMARY_COOKIE = "kayman_read_primary"
+
+
+def alembic_upgrade(bind: Engine = engine) -> None:
+    """
+    Upgrade the database to the head revision
+
+    When the stored revision is already the head, nothing else is loaded, env.py
+    included. Otherwise the upgrade runs behind a Postgres advisory lock, so of
+    several workers starting together only one migrates.
+    """
+    # Alembic is imported here, it is only needed once at startup
+    from alembic import command
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    def database_heads(connection: Connection) -> set[str]:
+        return set(MigrationContext.configure(connection).get_current_heads())
 
-def alembic_upgrade() -> None:
     alembic_cfg = Config("alembic.ini")
-    command.upgrade(alembic_cfg, "head")
+    heads = set(ScriptDirectory.from_config(alembic_cfg).get_heads())
+    with bind.connect() as connection:
+        if database_heads(connection) == heads:
+            logger.info("Database is up to date.")
+            return
+
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            connection.execute(select(func.pg_advisory_lock(MIGRATION_LOCK_ID)))
+        try:
+            # Another worker may have migrated while this one waited for the lock
+            if database_heads(connection) != heads:
+                alembic_cfg.attributes["connection"] = connection
+                command.upgrade(alembic_cfg, "head")
+            # Commit before unlocking, so the next worker sees the new revision
+            connection.commit()
+        finally:
+            if locked:
+                # End the transaction of a failed upgrade first, as Postgres rejects
+                # the unlock in an aborted transaction and its error would replace
+                # the upgrade's one
+                connection.rollback()
+                connection.execute(select(func.pg_advisory_unlock(MIGRATION_LOCK_ID)))
+                connection.commit()
     logger.info("Alembic upgrade completed.")
 
 
-def get_session() -> Generator[Session, Any, None]:
-    with Session(engine) as session:
+async def get_session(
+    request: Request, response: Response
+) -> AsyncGenerator[AsyncSession, Any]:
+    """
+    Session on the primary database, or on the replica for read requests
+
+    A client that made a write request reads from the primary for the next
+    POSTGRES_REPLICA_LAG seconds, so it sees its own writes before they reach the
+    replica. This is tracked by a cookie, which clients may also set themselves.
+    """
+    bind = async_engine
+    if async_replica_engine is not None and _reads_replica(request, response):
+        bind = async_replica_engine
+
+    # Loaded rows stay usable after commit, responses are serialized without IO
+    async with AsyncSession(bind, expire_on_commit=False) as session:
         yield session
+
+
+def get_sync_session(
+    request: Request, response: Response
+) -> Generator[Session, Any, None]:
+    """
+    Sync session for requests doing CPU-bound work, routed like `get_session`
+
+    Such requests run their work in the threadpool with this session instead of
+    using `run_sync`, which would hold up the event loop for the whole work.
+    """
+    bind = engine
+    if replica_engine is not None and _reads_replica(request, response):
+        bind = replica_engine
+    with Session(bind, expire_on_commit=False) as session:
+        yield session
+
+
+def _reads_replica(request: Request, response: Response) -> bool:
+    """Whether a request reads the replica, write requests set the cookie instead"""
+    if request.method not in READ_METHODS:
+        _set_read_primary_cookie(request, response)
+        return False
+    return READ_PRIMARY_COOKIE not in request.cookies
+
+
+def _set_read_primary_cookie(request: Request, response: Response) -> None:
+    """
+    The frontend is served from another origin and sends requests with credentials,
+    so over HTTPS the cookie is also sent cross-site. Browsers only accept that for
+    secure cookies, plain HTTP keeps the default of same-site requests only.
+    """
+    secure = request.url.scheme == "https"
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        "1",
+        max_age=settings.POSTGRES_REPLICA_LAG,
+        httponly=True,
+        secure=secure,
+        samesite="none" if secure else "lax",
+    )
+
+
+async def run_sync(
+    session: AsyncSession,
+    fn: Callable[Concatenate[Session, P], T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    """
+    Run sync CRUD and logic functions with an async session
+
+    The functions run on the event loop with the session's sync facade, and every
+    database call inside is awaited on the async driver, so no thread is held
+    while waiting on the database. Only use it for light work, the event loop is
+    held for all the Python code in between.
+    """
+    return await session.run_sync(fn, *args, **kwargs)  # type: ignore[arg-type]
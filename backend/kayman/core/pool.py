@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+from kayman.schemas.diagnostics import PoolStatus, PoolWaitBucket
+
+# Upper bounds of the checkout wait time histogram, in seconds
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+class PoolStats:
+    """
+    Connection statistics of a pool
+
+    Connects, checkouts, checkins and invalidations are counted by pool events.
+    Pool events fire once a connection is handed out, so the time spent waiting
+    for it is measured by the pool classes below.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.wait_histogram = [0] * len(WAIT_BUCKETS)
+
+    def listen(self, engine: Engine) -> None:
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def record_checkout(self, seconds: float, waited: bool, timed_out: bool) -> None:
+        with self._lock:
+            self.waits += waited
+            self.timeouts += timed_out
+            self.wait_seconds += seconds
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_histogram[index] += 1
+                    break
+
+    def status(self, pool: QueuePool) -> PoolStatus:
+        with self._lock:
+            return PoolStatus(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                connects=self.connects,
+                checkouts=self.checkouts,
+                checkins=self.checkins,
+                invalidations=self.invalidations,
+                waits=self.waits,
+                timeouts=self.timeouts,
+                wait_seconds=self.wait_seconds,
+                wait_histogram=[
+                    PoolWaitBucket(le=None if bound == float("inf") else bound, count=n)
+                    for bound, n in zip(WAIT_BUCKETS, self.wait_histogram, strict=True)
+                ],
+            )
+
+    def _on_connect(self, *_: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *_: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, *_: Any) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, *_: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+
+class StatsQueuePool(QueuePool):
+    """QueuePool recording the time each checkout waits into `stats`"""
+
+    stats: PoolStats
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        # Every connection is checked out and no overflow is left
+        waited = (
+            self.checkedin() == 0
+            and self._max_overflow > -1
+            and self.overflow() >= self._max_overflow
+        )
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_checkout(time.perf_counter() - start, waited, True)
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, waited, False)
+        return connection
+
+    def recreate(self) -> QueuePool:
+        pool = super().recreate()
+        if isinstance(pool, StatsQueuePool):
+            pool.stats = self.stats
+        return pool
+
+
+class StatsAsyncAdaptedQueuePool(StatsQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def attach_pool_stats(engine: Engine) -> PoolStats:
+    """Start collecting statistics of an engine created with a stats pool class"""
+    if not isinstance(engine.pool, StatsQueuePool):
+        raise ValueError(f"{type(engine.pool).__name__} doesn't record statistics")
+    stats = PoolStats()
+    engine.pool.stats = stats
+    stats.listen(engine)
+    return stats
@@ -0,0 +1,88 @@
+from collections.abc import Callable, Hashable, Mapping, Sequence
+from typing import Any, TypeVar
+
+from sqlalchemy import insert, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import class_mapper
+from sqlmodel import Session, SQLModel
+
+RowT = TypeVar("RowT", bound=SQLModel)
+
+
+def insert_rows(
+    session: Session,
+    rows: Sequence[RowT],
+    key: Callable[[RowT], Hashable] | None = None,
+    commit: bool = True,
+) -> list[RowT]:
+    """
+    Insert rows of a table model with multi-row INSERT ... RETURNING statements
+
+    Generated ids come back with the inserted rows, so rows never need a refresh.
+    Rows are returned in the given order, matched by `key` when the rows are unique
+    by something else than the generated primary key. Otherwise the database has to
+    return rows in order, which SQLite only does by inserting one row at a time.
+
+    Bulk inserts skip mapper events, so the insert listeners are dispatched here.
+    When committing, rows are detached first so the commit doesn't expire them.
+    """
+    if not rows:
+        return []
+    model = type(rows[0])
+    mapper = class_mapper(model)
+    connection = session.connection()
+    for row in rows:
+        mapper.dispatch.before_insert(mapper, connection, inspect(row))
+
+    primary_keys = [
+        mapper.get_property_by_column(column).key for column in mapper.primary_key
+    ]
+    unset_primary_keys = {
+        name for name in primary_keys if getattr(rows[0], name) is None
+    }
+    statement = insert(model).returning(model, sort_by_parameter_order=key is None)
+    db_rows: list[RowT] = list(
+        session.scalars(
+            statement, [row.model_dump(exclude=unset_primary_keys) for row in rows]
+        )
+    )
+    if key is not None:
+        key_to_row = {key(db_row): db_row for db_row in db_rows}
+        db_rows = [key_to_row[key(row)] for row in rows]
+
+    for db_row in db_rows:
+        mapper.dispatch.after_insert(mapper, connection, inspect(db_row))
+
+    if commit:
+        for db_row in db_rows:
+            session.expunge(db_row)
+        session.commit()
+    return db_rows
+
+
+def upsert_sums(
+    session: Session,
+    model: type[SQLModel],
+    key_columns: Sequence[str],
+    rows: Sequence[Mapping[str, Any]],
+) -> None:
+    """
+    Insert rows of a summary table, or add their other columns to the existing rows
+    with the same key, with one INSERT ... ON CONFLICT DO UPDATE. Rows must be
+    unique by key. Nothing is committed.
+    """
+    if not rows:
+        return
+    table = model.__table__  # type: ignore[attr-defined]
+    dialect = session.get_bind().dialect.name
+    upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = upsert(table).values(list(rows))
+    statement = statement.on_conflict_do_update(
+        index_elements=list(key_columns),
+        set_={
+            name: table.c[name] + statement.excluded[name]
+            for name in rows[0]
+            if name not in key_columns
+        },
+    )
+    session.connection().execute(statement)
@@ -1,16 +1,17 @@
 from collections.abc import Sequence
 from decimal import Decimal
 
-from sqlmodel import Integer, Session, cast, select
+from sqlmodel import Integer, Session, case, cast, col, func, select, update
+from sqlmodel.sql.expression import SelectOfScalar
 
+from kayman.crud._insert import insert_rows
 from kayman.schemas.account import Account, AccountBase, AccountCreate, AccountUpdate
 
 
 def create_account(session: Session, account: AccountCreate) -> AccountBase:
-    session.add(account)
-    session.commit()
-    session.refresh(account)
-    return account
+    # New accounts start from a zero balance unless one is given
+    db_account = Account.model_validate({"balance": Decimal(0), **account.model_dump()})
+    return insert_rows(session, [db_account])[0]
 
 
 def read_account(session: Session, account_id: int) -> Account | None:
@@ -20,14 +21,19 @@ def read_account(session: Session, account_id: int) -> Account | None:
 def read_accounts(
     session: Session, account_ids: list[int] | None = None, for_update: bool = False
 ) -> Sequence[Account]:
-    statement = select(Account)
-    if account_ids:
-        statement = statement.where(cast(Account.id, Integer).in_(account_ids))
+    statement = select_accounts(account_ids)
     if for_update:
         statement = statement.with_for_update()
     return session.exec(statement).all()
 
 
+def select_accounts(account_ids: list[int] | None = None) -> SelectOfScalar[Account]:
+    statement = select(Account)
+    if account_ids:
+        statement = statement.where(cast(Account.id, Integer).in_(account_ids))
+    return statement
+
+
 def update_accounts(
     session: Session, account_ids: list[int], accounts: list[AccountUpdate]
 ) -> Sequence[Account]:
@@ -54,22 +60,44 @@ def update_account_balances(
     account_amounts: dict[int, Decimal],
     commit: bool = True,
 ) -> Sequence[Account]:
+    """
+    Add amounts to account balances with a single UPDATE ... RETURNING
+
+    Balances are incremented in the database, so no lock is held across Python code.
+    Ledger versions are bumped along, for incremental balance verification. Nothing
+    is updated if any of the accounts does not exist.
+    """
+    if not account_amounts:
+        return []
     account_ids = list(account_amounts.keys())
-    db_accounts = _verify_account_ids(session, account_ids)
-    id_to_index = {account.id: index for index, account in enumerate(db_accounts)}
-    for account_id, amount in account_amounts.items():
-        db_account = db_accounts[id_to_index[account_id]]
-        db_account.balance += amount
+    existing_count = (
+        select(func.count())
+        .select_from(Account)
+        .where(col(Account.id).in_(account_ids))
+        .scalar_subquery()
+    )
+    statement = (
+        update(Account)
+        .where(col(Account.id).in_(account_ids))
+        .where(existing_count == len(account_ids))
+        .values(
+            balance=Account.balance + case(account_amounts, value=Account.id),
+            ledger_version=Account.ledger_version + 1,
+        )
+        .returning(Account)
+    )
+    db_accounts = session.scalars(
+        statement,
+        execution_options={"synchronize_session": False, "populate_existing": True},
+    ).all()
+    if len(db_accounts) != len(account_ids):
+        _verify_account_ids(session, account_ids)
+    id_to_account = {account.id: account for account in db_accounts}
 
-    session.add_all(db_accounts)
     if commit:
         session.commit()
-        for account in db_accounts:
-            session.refresh(account)
-    else:
-        session.flush()
 
-    return read_accounts(session, account_ids)
+    return [id_to_account[account_id] for account_id in account_ids]
 
 
 def _verify_account_ids(session: Session, account_ids: list[int]) -> Sequence[Account]:
@@ -0,0 +1,261 @@
+from collections.abc import Sequence
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Literal
+
+from sqlmodel import Session, case, col, delete, func, insert, select, update
+
+from kayman.crud._insert import upsert_sums
+from kayman.schemas.account import (
+    Account,
+    AccountBalanceAt,
+    AccountBalancePoint,
+    AccountDailyChange,
+    AccountDrift,
+    LedgerReport,
+)
+from kayman.schemas.transaction import Transaction
+
+Granularity = Literal["day", "week", "month"]
+DAILY_KEY = ("account_id", "day")
+HISTORY_POINTS_MAX = 3660  # Ten years of days
+
+
+def add_daily_changes(
+    session: Session, transactions: Sequence[Transaction], sign: int = 1
+) -> None:
+    """
+    Add stored transactions to the daily changes of their accounts, or subtract
+    them with `sign=-1`. Nothing is committed.
+    """
+    changes: dict[tuple[int, date | None], dict[str, Any]] = {}
+    for transaction in transactions:
+        key = (transaction.account_id, transaction.local_date)
+        change = changes.setdefault(
+            key, {"account_id": key[0], "day": key[1], "amount": Decimal(0), "count": 0}
+        )
+        change["amount"] += sign * transaction.amount
+        change["count"] += sign
+    upsert_sums(session, AccountDailyChange, DAILY_KEY, [*changes.values()])
+
+
+def read_balance_history(
+    session: Session,
+    account_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    granularity: Granularity = "day",
+) -> list[AccountBalancePoint]:
+    """
+    Balance of an account at the end of each day, week or month from `start` to
+    `end`, both inclusive
+
+    Balances are the running sum of the daily changes, so a drifted stored balance
+    doesn't shift them: one aggregate of the changes before the first period, then
+    the changes within the range. `start` defaults to the first day with
+    transactions, at most HISTORY_POINTS_MAX periods before `end`, which defaults
+    to today. Longer ranges are rejected.
+    """
+    if session.get(Account, account_id) is None:
+        raise ValueError("Account not found")
+    end = end or date.today()
+    if start is None:
+        first_day = session.exec(
+            select(func.min(AccountDailyChange.day)).where(
+                AccountDailyChange.account_id == account_id
+            )
+        ).one()
+        start = max(min(first_day or end, end), _earliest_start(end, granularity))
+    elif count_periods(start, end, granularity) > HISTORY_POINTS_MAX:
+        raise ValueError(f"More than {HISTORY_POINTS_MAX} points requested")
+
+    period = _period_start(start, granularity)
+    day = col(AccountDailyChange.day)
+    balance = session.exec(
+        select(func.coalesce(func.sum(AccountDailyChange.amount), 0)).where(
+            AccountDailyChange.account_id == account_id, day < period
+        )
+    ).one()
+    statement = (
+        select(day, col(AccountDailyChange.amount))
+        .where(
+            AccountDailyChange.account_id == account_id,
+            day >= period,
+            day <= end,
+        )
+        .order_by(day)
+    )
+    rows = session.exec(statement).all()
+
+    points = []
+    index = 0
+    while period <= end:
+        next_period = _next_period(period, granularity)
+        while index < len(rows) and rows[index][0] < next_period:
+            balance += rows[index][1]
+            index += 1
+        points.append(AccountBalancePoint(start=period, balance=balance))
+        period = next_period
+    return points
+
+
+def count_periods(start: date, end: date, granularity: Granularity) -> int:
+    """Number of days, weeks or months from `start` to `end`, both inclusive"""
+    if granularity == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    days = (_period_start(end, granularity) - _period_start(start, granularity)).days
+    return days // (7 if granularity == "week" else 1) + 1
+
+
+def read_balance_at(
+    session: Session, account_id: int, timestamp: datetime | None = None
+) -> AccountBalanceAt:
+    """
+    Balance of an account right after its last transaction at or before
+    `timestamp`, which defaults to now
+
+    The running balance stored on that transaction is read with one lookup on the
+    (account_id, timestamp, id) index.
+    """
+    if session.get(Account, account_id) is None:
+        raise ValueError("Account not found")
+    timestamp = timestamp or datetime.now(UTC)
+
+    statement = (
+        select(col(Transaction.id), col(Transaction.running_balance))
+        .where(
+            Transaction.account_id == account_id,
+            col(Transaction.timestamp) <= timestamp,
+        )
+        .order_by(col(Transaction.timestamp).desc(), col(Transaction.id).desc())
+        .limit(1)
+    )
+    row = session.exec(statement).first()
+    if row is None:
+        return AccountBalanceAt(
+            timestamp=timestamp, balance=Decimal(0), transaction_id=None
+        )
+    return AccountBalanceAt(timestamp=timestamp, balance=row[1], transaction_id=row[0])
+
+
+def verify_account_balances(
+    session: Session, pending: bool = False, commit: bool = False
+) -> LedgerReport:
+    """
+    Compare account balances with the sum of their transactions in one aggregate
+    query
+
+    With `pending`, only accounts whose balance changed since they were last
+    verified are, deletions included. Changes are counted by the ledger version the
+    balance update bumps, so they are seen in commit order whatever their ids.
+    Transactions changed without a balance update are only caught by a full run.
+
+    With `commit`, the versions of accounts without drift are recorded as verified
+    and committed. Drifted accounts stay pending until they verify clean.
+    """
+    ledger_balance = func.coalesce(func.sum(Transaction.amount), 0)
+    statement = (
+        select(
+            col(Account.id),
+            col(Account.balance),
+            col(Account.ledger_version),
+            ledger_balance,
+        )
+        .outerjoin(Transaction, col(Transaction.account_id) == Account.id)
+        .group_by(col(Account.id), col(Account.balance), col(Account.ledger_version))
+        .order_by(col(Account.id))
+    )
+    if pending:
+        statement = statement.where(
+            col(Account.ledger_version) > col(Account.verified_version)
+        )
+    rows = session.exec(statement).all()
+
+    drifts = [
+        AccountDrift(
+            account_id=account_id,
+            balance=balance,
+            ledger_balance=ledger,
+            drift=balance - ledger,
+        )
+        for account_id, balance, _, ledger in rows
+        if balance != ledger
+    ]
+    if commit:
+        versions = {
+            account_id: version
+            for account_id, balance, version, ledger in rows
+            if balance == ledger
+        }
+        if versions:
+            # Versions only move forward, a concurrent run may have recorded a later
+            session.connection().execute(
+                update(Account)
+                .where(
+                    col(Account.id).in_(versions),
+                    col(Account.verified_version) < case(versions, value=Account.id),
+                )
+                .values(verified_version=case(versions, value=Account.id))
+            )
+        session.commit()
+    return LedgerReport(checked=len(rows), drifts=drifts)
+
+
+def rebuild_account_balances(session: Session, commit: bool = True) -> None:
+    """Set every account balance to the sum of its transactions with one UPDATE"""
+    ledger_balance = (
+        select(func.coalesce(func.sum(Transaction.amount), 0))
+        .where(Transaction.account_id == Account.id)
+        .scalar_subquery()
+    )
+    session.connection().execute(update(Account).values(balance=ledger_balance))
+
+    if commit:
+        session.commit()
+
+
+def rebuild_daily_changes(session: Session, commit: bool = True) -> None:
+    """Recompute the daily changes of all accounts from their transactions"""
+    connection = session.connection()
+    connection.execute(delete(AccountDailyChange))
+    connection.execute(
+        insert(AccountDailyChange).from_select(
+            [*DAILY_KEY, "amount", "count"],
+            select(
+                col(Transaction.account_id),
+                col(Transaction.local_date),
+                func.sum(Transaction.amount),
+                func.count(),
+            ).group_by(col(Transaction.account_id), col(Transaction.local_date)),
+        )
+    )
+
+    if commit:
+        session.commit()
+
+
+def _period_start(day: date, granularity: Granularity) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(period: date, granularity: Granularity) -> date:
+    if granularity == "week":
+        return period + timedelta(weeks=1)
+    if granularity == "month":
+        return (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return period + timedelta(days=1)
+
+
+def _earliest_start(end: date, granularity: Granularity) -> date:
+    """First day of the earliest period in a history of at most HISTORY_POINTS_MAX"""
+    steps = HISTORY_POINTS_MAX - 1
+    if granularity == "month":
+        months = end.year * 12 + end.month - 1 - steps
+        return date(months // 12, months % 12 + 1, 1) if months >= 12 else date.min
+    days = steps * (7 if granularity == "week" else 1)
+    ordinal = _period_start(end, granularity).toordinal() - days
+    return date.fromordinal(ordinal) if ordinal >= 1 else date.min
@@ -0,0 +1,175 @@
+import time
+from collections.abc import Sequence
+from datetime import datetime
+from threading import Lock
+
+from sqlmodel import Session, case, col, func, select
+
+from kayman.core.config import settings
+from kayman.crud._insert import insert_rows
+from kayman.schemas.category import (
+    Category,
+    CategoryBase,
+    CategoryClosure,
+    CategoryCreate,
+    CategoryReadWithChildren,
+    CategoryRollup,
+)
+from kayman.schemas.payment import Payment, PaymentEntry
+
+
+class CategoryTree:
+    """In-process cache of the category forest, rebuilt after categories change
+
+    The whole table is read with one query and assembled in memory, so the tree has
+    any depth. Each process keeps its own copy, invalidated by the functions below
+    that write categories. Writes made by other processes are only seen once the
+    copy is older than `ttl` seconds, so the cache is for display only.
+
+    Trees read within `settle` seconds of a write are not cached, as they may come
+    from a read replica that has not caught up yet.
+    """
+
+    def __init__(self, ttl: float, settle: float = 0) -> None:
+        self.ttl = ttl
+        self.settle = settle
+        self._lock = Lock()
+        self._generation = 0
+        self._invalidated_at = 0.0
+        self._loaded_at = 0.0
+        self._nodes: dict[int, CategoryReadWithChildren] | None = None
+        self._roots: list[CategoryReadWithChildren] = []
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at = time.monotonic()
+            self._nodes = None
+            self._roots = []
+
+    def roots(self, session: Session) -> list[CategoryReadWithChildren]:
+        return self._load(session)[1]
+
+    def nodes(self, session: Session) -> dict[int, CategoryReadWithChildren]:
+        return self._load(session)[0]
+
+    def _load(
+        self, session: Session
+    ) -> tuple[dict[int, CategoryReadWithChildren], list[CategoryReadWithChildren]]:
+        with self._lock:
+            fresh = time.monotonic() - self._loaded_at < self.ttl
+            if self._nodes is not None and fresh:
+                return self._nodes, self._roots
+            generation = self._generation
+        loaded_at = time.monotonic()
+
+        categories = session.exec(select(Category).order_by(col(Category.id))).all()
+        nodes = {
+            category.id: CategoryReadWithChildren.model_validate(
+                category.model_dump(), update={"sub_categories": []}
+            )
+            for category in categories
+            if category.id is not None
+        }
+        roots: list[CategoryReadWithChildren] = []
+        for node in nodes.values():
+            parent = nodes.get(node.parent_id) if node.parent_id else None
+            if parent is None:
+                roots.append(node)
+            else:
+                assert parent.sub_categories is not None
+                parent.sub_categories.append(node)
+
+        with self._lock:
+            # Keep a tree read before a concurrent write from being cached
+            settled = time.monotonic() - self._invalidated_at >= self.settle
+            if generation == self._generation and settled:
+                self._nodes, self._roots = nodes, roots
+                self._loaded_at = loaded_at
+        return nodes, roots
+
+
+category_tree = CategoryTree(
+    ttl=settings.CATEGORY_TREE_TTL,
+    settle=settings.POSTGRES_REPLICA_LAG if settings.POSTGRES_REPLICA_HOST else 0,
+)
+
+
+def create_category(session: Session, category: CategoryCreate) -> CategoryBase:
+    db_category = insert_rows(session, [Category.model_validate(category)])[0]
+    category_tree.invalidate()
+    return db_category
+
+
+def read_category_tree(session: Session) -> list[CategoryReadWithChildren]:
+    return category_tree.roots(session)
+
+
+def read_category_subtree(
+    session: Session, category_id: int
+) -> CategoryReadWithChildren | None:
+    return category_tree.nodes(session).get(category_id)
+
+
+def read_category_rollup(
+    session: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency_code: str | None = None,
+) -> Sequence[CategoryRollup]:
+    """
+    Sum the entries of payments in a time window per category and currency
+
+    Each entry counts toward its own category and every ancestor of it. `start` is
+    inclusive and `end` is exclusive.
+    """
+    subtotal = PaymentEntry.amount * PaymentEntry.quantity
+    own = col(CategoryClosure.depth) == 0
+    statement = (
+        select(  # type: ignore[call-overload]  # More columns than typed for
+            col(CategoryClosure.ancestor_id).label("category_id"),
+            col(PaymentEntry.currency_code),
+            func.sum(case((own, 1), else_=0)).label("count"),
+            func.sum(case((own, subtotal), else_=0)).label("amount"),
+            func.count().label("total_count"),
+            func.sum(subtotal).label("total_amount"),
+        )
+        .select_from(PaymentEntry)
+        .join(Payment, col(Payment.id) == PaymentEntry.payment_id)
+        .join(
+            CategoryClosure,
+            col(CategoryClosure.descendant_id) == PaymentEntry.category_id,
+        )
+        .group_by(col(CategoryClosure.ancestor_id), col(PaymentEntry.currency_code))
+        .order_by(col(CategoryClosure.ancestor_id), col(PaymentEntry.currency_code))
+    )
+    if start:
+        statement = statement.where(Payment.timestamp >= start)
+    if end:
+        statement = statement.where(Payment.timestamp < end)
+    if currency_code:
+        statement = statement.where(PaymentEntry.currency_code == currency_code)
+    return [
+        CategoryRollup.model_validate(row._mapping)
+        for row in session.exec(statement).all()
+    ]
+
+
+def update_category(session: Session, category: Category) -> Category:
+    # Verify the new parent is not the category itself or one of its descendants,
+    # against the closure table as the cached tree may miss other processes' writes
+    if category.parent_id is not None:
+        descendant = session.exec(
+            select(CategoryClosure).where(
+                CategoryClosure.ancestor_id == category.id,
+                CategoryClosure.descendant_id == category.parent_id,
+            )
+        ).first()
+        if descendant is not None:
+            raise ValueError("Category can not be its own ancestor")
+
+    db_category = session.merge(category)
+    session.commit()
+    session.refresh(db_category)
+    category_tree.invalidate()
+    return db_category
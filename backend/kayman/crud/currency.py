@@ -2,15 +2,12 @@ from collections.abc import Sequence
 
 from sqlmodel import Session, select
 
+from kayman.crud._insert import insert_rows
 from kayman.schemas.currency import Currency
 
 
 def create_currency(session: Session, currency: Currency) -> Currency:
-    db_currency = Currency.model_validate(currency)
-    session.add(db_currency)
-    session.commit()
-    session.refresh(db_currency)
-    return db_currency
+    return insert_rows(session, [Currency.model_validate(currency)])[0]
 
 
 def read_currencies(session: Session) -> Sequence[Currency]:
@@ -0,0 +1,152 @@
+from collections.abc import Sequence
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from sqlmodel import Session, col, delete, func, insert, select
+
+from kayman.crud._insert import upsert_sums
+from kayman.schemas.monthly_flow import MonthlyAccountFlow, MonthlyCategoryFlow
+from kayman.schemas.payment import Payment, PaymentEntry, PaymentType
+from kayman.schemas.transaction import Transaction
+
+CATEGORY_KEY = ("month", "category_id", "currency_code", "type")
+ACCOUNT_KEY = ("month", "account_id", "type")
+
+
+def add_monthly_flows(
+    session: Session,
+    payments: Sequence[Payment],
+    entries: Sequence[PaymentEntry],
+    transactions: Sequence[Transaction],
+    sign: int = 1,
+) -> None:
+    """
+    Add stored rows of payments to the monthly flows, or subtract them with
+    `sign=-1`. Nothing is committed.
+
+    Rows are summed per month in Python first, then added with one upsert per table.
+    """
+    payment_types = {payment.id: payment.type for payment in payments}
+    payment_months = {payment.id: payment.local_month for payment in payments}
+
+    category_flows: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for entry in entries:
+        key: tuple[Any, ...] = (
+            payment_months[entry.payment_id],
+            entry.category_id,
+            entry.currency_code,
+            payment_types[entry.payment_id],
+        )
+        flow = category_flows.setdefault(key, _empty_flow(CATEGORY_KEY, key))
+        flow["amount"] += sign * entry.amount * entry.quantity
+        flow["count"] += sign
+
+    account_flows: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for transaction in transactions:
+        key = (
+            transaction.local_month,
+            transaction.account_id,
+            payment_types[transaction.payment_id],
+        )
+        flow = account_flows.setdefault(key, _empty_flow(ACCOUNT_KEY, key))
+        flow["amount"] += sign * transaction.amount
+        flow["count"] += sign
+
+    upsert_sums(session, MonthlyCategoryFlow, CATEGORY_KEY, [*category_flows.values()])
+    upsert_sums(session, MonthlyAccountFlow, ACCOUNT_KEY, [*account_flows.values()])
+
+
+def read_monthly_category_flows(
+    session: Session,
+    start: date | None = None,
+    end: date | None = None,
+    type: PaymentType | None = None,
+) -> Sequence[MonthlyCategoryFlow]:
+    """Read category flows of months from `start` (inclusive) to `end` (exclusive)"""
+    statement = (
+        select(MonthlyCategoryFlow)
+        .where(MonthlyCategoryFlow.count != 0)
+        .order_by(*[col(getattr(MonthlyCategoryFlow, key)) for key in CATEGORY_KEY])
+    )
+    if start:
+        statement = statement.where(MonthlyCategoryFlow.month >= start)
+    if end:
+        statement = statement.where(MonthlyCategoryFlow.month < end)
+    if type:
+        statement = statement.where(MonthlyCategoryFlow.type == type)
+    return session.exec(statement).all()
+
+
+def read_monthly_account_flows(
+    session: Session,
+    start: date | None = None,
+    end: date | None = None,
+    account_id: int | None = None,
+) -> Sequence[MonthlyAccountFlow]:
+    """Read account flows of months from `start` (inclusive) to `end` (exclusive)"""
+    statement = (
+        select(MonthlyAccountFlow)
+        .where(MonthlyAccountFlow.count != 0)
+        .order_by(*[col(getattr(MonthlyAccountFlow, key)) for key in ACCOUNT_KEY])
+    )
+    if start:
+        statement = statement.where(MonthlyAccountFlow.month >= start)
+    if end:
+        statement = statement.where(MonthlyAccountFlow.month < end)
+    if account_id:
+        statement = statement.where(MonthlyAccountFlow.account_id == account_id)
+    return session.exec(statement).all()
+
+
+def rebuild_monthly_flows(session: Session, commit: bool = True) -> None:
+    """Recompute the monthly flows from all payments"""
+    connection = session.connection()
+    connection.execute(delete(MonthlyCategoryFlow))
+    connection.execute(delete(MonthlyAccountFlow))
+
+    connection.execute(
+        insert(MonthlyCategoryFlow).from_select(
+            [*CATEGORY_KEY, "amount", "count"],
+            select(  # type: ignore[call-overload]  # More columns than typed for
+                Payment.local_month,
+                PaymentEntry.category_id,
+                PaymentEntry.currency_code,
+                Payment.type,
+                func.sum(PaymentEntry.amount * PaymentEntry.quantity),
+                func.count(),
+            )
+            .join(Payment, col(Payment.id) == PaymentEntry.payment_id)
+            .group_by(
+                Payment.local_month,
+                PaymentEntry.category_id,
+                PaymentEntry.currency_code,
+                Payment.type,
+            ),
+        )
+    )
+    connection.execute(
+        insert(MonthlyAccountFlow).from_select(
+            [*ACCOUNT_KEY, "amount", "count"],
+            select(  # type: ignore[call-overload]  # More columns than typed for
+                Transaction.local_month,
+                Transaction.account_id,
+                Payment.type,
+                func.sum(Transaction.amount),
+                func.count(),
+            )
+            .join(Payment, col(Payment.id) == Transaction.payment_id)
+            .group_by(Transaction.local_month, Transaction.account_id, Payment.type),
+        )
+    )
+
+    if commit:
+        session.commit()
+
+
+def _empty_flow(key_columns: tuple[str, ...], key: tuple[Any, ...]) -> dict[str, Any]:
+    return {
+        **dict(zip(key_columns, key, strict=True)),
+        "amount": Decimal(0),
+        "count": 0,
+    }
@@ -1,8 +1,12 @@
 from collections.abc import Sequence
-from datetime import date
+from datetime import date, datetime
 
-from sqlmodel import Session, func, select
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, select, tuple_
+from sqlmodel.sql.expression import SelectOfScalar
 
+from kayman.crud._insert import insert_rows
+from kayman.schemas.category import CategoryClosure
 from kayman.schemas.payment import (
     Payment,
     PaymentBase,
@@ -10,33 +14,88 @@ from kayman.schemas.payment import (
     PaymentEntry,
 )
 
+# Load relationships serialized by PaymentReadDetailed in bulk,
+# one query per relationship regardless of the number of payments
+DETAILED_OPTIONS = (
+    selectinload(Payment.transactions),  # type: ignore[arg-type]
+    selectinload(Payment.entries),  # type: ignore[arg-type]
+)
+
 
 def create_payment(
     session: Session, payment: PaymentCreate, commit: bool = True
 ) -> PaymentBase:
-    db_payment = Payment.model_validate(payment)
-    session.add(db_payment)
-    if commit:
-        session.commit()
-        session.refresh(db_payment)
-    else:
-        session.flush()
-    return db_payment
+    return insert_rows(session, [Payment.model_validate(payment)], commit=commit)[0]
+
+
+def create_payments(
+    session: Session, payments: Sequence[PaymentBase], commit: bool = True
+) -> Sequence[Payment]:
+    # Rows built by the caller are stored as is, without validating again
+    db_payments = [
+        payment if isinstance(payment, Payment) else Payment.model_validate(payment)
+        for payment in payments
+    ]
+    return insert_rows(session, db_payments, commit=commit)
 
 
 def read_payment(session: Session, payment_id: int) -> Payment | None:
-    return session.get(Payment, payment_id)
+    return session.get(
+        Payment, payment_id, options=DETAILED_OPTIONS, populate_existing=True
+    )
 
 
 def read_payments(
-    session: Session, payment_date: date | None = None, category_id: int | None = None
+    session: Session,
+    payment_date: date | None = None,
+    category_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
 ) -> Sequence[Payment]:
-    scalar = select(Payment).distinct()
+    """
+    Read payments ordered by (timestamp, id)
+
+    `start` is inclusive and `end` is exclusive. `after` is the (timestamp, id) key
+    of the last payment of the previous page.
+    """
+    scalar = select_payments(payment_date, category_id, start, end, after)
+    if limit:
+        scalar = scalar.limit(limit)
+    return session.exec(scalar).all()
+
+
+def select_payments(
+    payment_date: date | None = None,
+    category_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> SelectOfScalar[Payment]:
+    """Select payments with their details ordered by (timestamp, id)"""
+    scalar = (
+        select(Payment)
+        .distinct()
+        .options(*DETAILED_OPTIONS)
+        .order_by(Payment.timestamp, Payment.id)  # type: ignore[arg-type]
+    )
     if payment_date:
-        scalar = scalar.where(func.date(Payment.timestamp) == payment_date)
+        scalar = scalar.where(Payment.local_date == payment_date)
     if category_id:
-        scalar = scalar.join(PaymentEntry).where(
-            PaymentEntry.category_id == category_id
+        # Entries of the category or any of its subcategories
+        scalar = (
+            scalar.join(PaymentEntry)
+            .join(
+                CategoryClosure,
+                col(CategoryClosure.descendant_id) == PaymentEntry.category_id,
+            )
+            .where(CategoryClosure.ancestor_id == category_id)
         )
-    payments = session.exec(scalar).all()
-    return payments
+    if start:
+        scalar = scalar.where(Payment.timestamp >= start)
+    if end:
+        scalar = scalar.where(Payment.timestamp < end)
+    if after:
+        scalar = scalar.where(tuple_(Payment.timestamp, Payment.id) > after)
+    return scalar
@@ -2,20 +2,23 @@ from collections.abc import Sequence
 
 from sqlmodel import Session
 
+from kayman.crud._insert import insert_rows
 from kayman.schemas.payment import PaymentEntry, PaymentEntryBase
 
 
 def create_payment_entries(
     session: Session,
-    entries: list[PaymentEntryBase],
+    entries: Sequence[PaymentEntryBase],
     commit: bool = True,
 ) -> Sequence[PaymentEntryBase]:
-    db_entries = [PaymentEntry.model_validate(entry) for entry in entries]
-    session.add_all(db_entries)
-    if commit:
-        session.commit()
-        for db_entry in db_entries:
-            session.refresh(db_entry)
-    else:
-        session.flush()
-    return db_entries
+    # Rows built by the caller are stored as is, without validating again
+    db_entries = [
+        entry if isinstance(entry, PaymentEntry) else PaymentEntry.model_validate(entry)
+        for entry in entries
+    ]
+    return insert_rows(
+        session,
+        db_entries,
+        key=lambda entry: (entry.payment_id, entry.index),
+        commit=commit,
+    )
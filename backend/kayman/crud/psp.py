@@ -0,0 +1,8 @@
+from sqlmodel import Session
+
+from kayman.crud._insert import insert_rows
+from kayman.schemas.psp import PSP, PSPBase, PSPCreate
+
+
+def create_psp(session: Session, psp: PSPCreate) -> PSPBase:
+    return insert_rows(session, [PSP.model_validate(psp)])[0]
@@ -1,31 +1,196 @@
 from collections.abc import Sequence
+from datetime import datetime
+from typing import Literal
 
-from sqlmodel import Session, select
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, false, func, select, tuple_, update
+from sqlmodel.sql.expression import SelectOfScalar
 
+from kayman.crud._insert import insert_rows
 from kayman.schemas.transaction import Transaction, TransactionBase
 
+ReconcileQueue = Literal["account", "psp"]
+
 
 def create_transactions(
     session: Session,
     txns: Sequence[TransactionBase],
     commit: bool = True,
 ) -> Sequence[TransactionBase]:
-    db_txns = [Transaction.model_validate(txn) for txn in txns]
-    session.add_all(db_txns)
-    if commit:
-        session.commit()
-        for db_txn in db_txns:
-            session.refresh(db_txn)
-    else:
-        session.flush()
-    return db_txns
+    # Rows built by the caller are stored as is, without validating again
+    db_txns = [
+        txn if isinstance(txn, Transaction) else Transaction.model_validate(txn)
+        for txn in txns
+    ]
+    return insert_rows(
+        session,
+        db_txns,
+        key=lambda txn: (txn.payment_id, txn.index),
+        commit=commit,
+    )
 
 
 def get_transactions(
-    session: Session, account_id: int | None = None
+    session: Session,
+    account_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
 ) -> Sequence[Transaction]:
-    scalar = select(Transaction)
+    """
+    Read transactions ordered by (timestamp, id)
+
+    `start` is inclusive and `end` is exclusive. `after` is the (timestamp, id) key
+    of the last transaction of the previous page.
+    """
+    scalar = select_transactions(account_id, start, end, after)
+    if limit:
+        scalar = scalar.limit(limit)
+    return session.exec(scalar).all()
+
+
+def select_transactions(
+    account_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> SelectOfScalar[Transaction]:
+    """
+    Select transactions ordered by (timestamp, id), which the (account_id,
+    timestamp, id) and (timestamp, id) indexes serve without sorting
+    """
+    scalar = select(Transaction).order_by(
+        col(Transaction.timestamp), col(Transaction.id)
+    )
     if account_id:
         scalar = scalar.where(Transaction.account_id == account_id)
-    txns = session.exec(scalar).all()
-    return txns
+    if start:
+        scalar = scalar.where(Transaction.timestamp >= start)
+    if end:
+        scalar = scalar.where(Transaction.timestamp < end)
+    if after:
+        scalar = scalar.where(tuple_(Transaction.timestamp, Transaction.id) > after)
+    return scalar
+
+
+def get_unreconciled_transactions(
+    session: Session,
+    queue: ReconcileQueue = "account",
+    account_id: int | None = None,
+    psp_id: int | None = None,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None,
+) -> Sequence[Transaction]:
+    """
+    Read transactions not yet reconciled with the account statement, or with the
+    payment service provider for the `psp` queue, ordered by (timestamp, id)
+    """
+    scalar = select_unreconciled_transactions(queue, account_id, psp_id, after)
+    if limit:
+        scalar = scalar.limit(limit)
+    return session.exec(scalar).all()
+
+
+def count_unreconciled_transactions(
+    session: Session,
+    queue: ReconcileQueue = "account",
+    account_id: int | None = None,
+    psp_id: int | None = None,
+) -> int:
+    scalar = select_unreconciled_transactions(queue, account_id, psp_id)
+    statement = select(func.count()).select_from(scalar.order_by(None).subquery())
+    return session.exec(statement).one()
+
+
+def select_unreconciled_transactions(
+    queue: ReconcileQueue = "account",
+    account_id: int | None = None,
+    psp_id: int | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> SelectOfScalar[Transaction]:
+    """
+    Select a reconciliation queue with the conditions of its partial index, so only
+    the entries of the queue are scanned
+    """
+    scalar = select_transactions(account_id, after=after)
+    if queue == "psp":
+        scalar = scalar.where(
+            col(Transaction.psp_id).is_not(None), Transaction.psp_reconcile == false()
+        )
+    else:
+        scalar = scalar.where(Transaction.reconcile == false())
+    if psp_id:
+        scalar = scalar.where(Transaction.psp_id == psp_id)
+    return scalar
+
+
+def update_running_balances(
+    session: Session, transactions: Sequence[Transaction]
+) -> None:
+    """
+    Recompute running balances of the accounts of stored or deleted transactions,
+    from the earliest of them onwards. Nothing is committed.
+
+    Each account takes one UPDATE: the transactions from that point on are summed
+    with a window function, on top of the running balance right before it. Appending
+    transactions only touches the new rows. Rows already loaded in the session are
+    not refreshed.
+    """
+    starts: dict[int, datetime] = {}
+    for transaction in transactions:
+        start = starts.get(transaction.account_id)
+        if start is None or transaction.timestamp < start:
+            starts[transaction.account_id] = transaction.timestamp
+
+    connection = session.connection()
+    earlier = aliased(Transaction)
+    for account_id, start in starts.items():
+        previous = (
+            select(col(earlier.running_balance))
+            .where(earlier.account_id == account_id, col(earlier.timestamp) < start)
+            .order_by(col(earlier.timestamp).desc(), col(earlier.id).desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        suffix = (
+            select(
+                col(Transaction.id),
+                func.sum(Transaction.amount)
+                .over(order_by=(col(Transaction.timestamp), col(Transaction.id)))
+                .label("running_balance"),
+            )
+            .where(
+                Transaction.account_id == account_id,
+                col(Transaction.timestamp) >= start,
+            )
+            .subquery()
+        )
+        connection.execute(
+            update(Transaction)
+            .where(col(Transaction.id) == suffix.c.id)
+            .values(
+                running_balance=func.coalesce(previous, 0) + suffix.c.running_balance
+            )
+        )
+
+
+def rebuild_running_balances(session: Session, commit: bool = True) -> None:
+    """Recompute the running balances of all transactions with one UPDATE"""
+    running = select(
+        col(Transaction.id),
+        func.sum(Transaction.amount)
+        .over(
+            partition_by=col(Transaction.account_id),
+            order_by=(col(Transaction.timestamp), col(Transaction.id)),
+        )
+        .label("running_balance"),
+    ).subquery()
+    session.connection().execute(
+        update(Transaction)
+        .where(col(Transaction.id) == running.c.id)
+        .values(running_balance=running.c.running_balance)
+    )
+
+    if commit:
+        session.commit()
@@ -1,7 +1,30 @@
+from collections.abc import Iterable, Iterator, Sequence
 from decimal import Decimal
 
-from kayman.schemas.api_models import PaymentCreateDetailed
-from kayman.schemas.payment import PaymentType
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, col, select
+
+from kayman.crud.account import read_accounts, update_account_balances
+from kayman.crud.account_balance import add_daily_changes
+from kayman.crud.monthly_flow import add_monthly_flows
+from kayman.crud.payment import create_payments, read_payment
+from kayman.crud.payment_entry import create_payment_entries
+from kayman.crud.transaction import create_transactions, update_running_balances
+from kayman.logics.account import update_balances_with_transactions
+from kayman.schemas.api_models import (
+    PaymentBatchError,
+    PaymentCreateDetailed,
+    PaymentImportError,
+    PaymentImportProgress,
+)
+from kayman.schemas.category import Category
+from kayman.schemas.currency import Currency
+from kayman.schemas.payment import Payment, PaymentEntry, PaymentRead, PaymentType
+from kayman.schemas.transaction import Transaction
+
+IMPORT_CHUNK_SIZE = 500
+IMPORT_ERRORS_MAX = 100
 
 
 def validate_total(details: PaymentCreateDetailed) -> None:
@@ -33,3 +56,261 @@ def validate_total(details: PaymentCreateDetailed) -> None:
                 f"Entries total ({entries_total}) and "
                 f"transactions total ({transactions_total}) do not match"
             )
+
+
+def validate_batch(
+    session: Session, batch: Sequence[PaymentCreateDetailed]
+) -> list[PaymentBatchError]:
+    """Validate every payment of a batch, references are checked with one query each"""
+    account_ids = {txn.account_id for details in batch for txn in details.transactions}
+    category_ids = {entry.category_id for details in batch for entry in details.entries}
+    currency_codes = {
+        entry.currency_code for details in batch for entry in details.entries
+    }
+    known_account_ids = {
+        account.id for account in read_accounts(session, list(account_ids))
+    }
+    known_category_ids = set(
+        session.exec(
+            select(Category.id).where(col(Category.id).in_(category_ids))
+        ).all()
+    )
+    known_currency_codes = set(
+        session.exec(
+            select(Currency.code).where(col(Currency.code).in_(currency_codes))
+        ).all()
+    )
+
+    errors = []
+    for index, details in enumerate(batch):
+        try:
+            validate_total(details)
+        except ValueError as err:
+            errors.append(PaymentBatchError(index=index, detail=err.args[0]))
+            continue
+
+        missing_accounts = {
+            txn.account_id for txn in details.transactions
+        } - known_account_ids
+        if missing_accounts:
+            errors.append(
+                PaymentBatchError(
+                    index=index, detail=f"Account id(s) not found: {missing_accounts}"
+                )
+            )
+        missing_categories = {
+            entry.category_id for entry in details.entries
+        } - known_category_ids
+        if missing_categories:
+            errors.append(
+                PaymentBatchError(
+                    index=index,
+                    detail=f"Category id(s) not found: {missing_categories}",
+                )
+            )
+        missing_currencies = {
+            entry.currency_code for entry in details.entries
+        } - known_currency_codes
+        if missing_currencies:
+            errors.append(
+                PaymentBatchError(
+                    index=index,
+                    detail=f"Currency code(s) not found: {missing_currencies}",
+                )
+            )
+    return errors
+
+
+def build_payment_rows(
+    payment_id: int, details: PaymentCreateDetailed
+) -> tuple[list[PaymentEntry], list[Transaction]]:
+    """
+    Build entry and transaction rows of a stored payment from the request
+
+    The request is validated already, so rows are constructed directly instead of
+    being validated again.
+    """
+    entries = [
+        PaymentEntry(**entry.model_dump(), payment_id=payment_id, index=index)
+        for index, entry in enumerate(details.entries)
+    ]
+    transactions = [
+        Transaction(**transaction.model_dump(), payment_id=payment_id, index=index)
+        for index, transaction in enumerate(details.transactions)
+    ]
+    return entries, transactions
+
+
+def create_payments_detailed(
+    session: Session, batch: Sequence[PaymentCreateDetailed]
+) -> Sequence[Payment]:
+    """
+    Store payments along with their entries and transactions, and apply the
+    combined balance change of each account. Nothing is committed.
+
+    Each stage is flushed once for the whole batch, which the ORM sends as
+    multi-row INSERT statements.
+    """
+    # Store payments
+    db_payments = create_payments(
+        session,
+        [Payment(**details.payment.model_dump()) for details in batch],
+        commit=False,
+    )
+
+    entries: list[PaymentEntry] = []
+    transactions: list[Transaction] = []
+    for db_payment, details in zip(db_payments, batch, strict=True):
+        if db_payment.id is None:
+            raise ValueError("Payment id is not generated")
+        payment_entries, payment_transactions = build_payment_rows(
+            db_payment.id, details
+        )
+        entries.extend(payment_entries)
+        transactions.extend(payment_transactions)
+
+    # Store entries and transactions
+    create_payment_entries(session, entries, commit=False)
+    create_transactions(session, transactions, commit=False)
+
+    # Modify account balance
+    update_balances_with_transactions(
+        session,
+        [txn for details in batch for txn in details.transactions],
+        commit=False,
+    )
+
+    # Running balances are computed while holding the account rows locked by the
+    # balance update, so concurrent payments on an account see each other's rows
+    update_running_balances(session, transactions)
+
+    # Add to monthly flows and daily balance changes
+    add_monthly_flows(session, db_payments, entries, transactions)
+    add_daily_changes(session, transactions)
+
+    return db_payments
+
+
+def update_payment(session: Session, payment: PaymentRead) -> Payment:
+    """
+    Update the fields of a stored payment and move its entries and transactions
+    between monthly flows. Nothing is committed.
+    """
+    db_payment = read_payment(session, payment.id)
+    if db_payment is None:
+        raise ValueError("Payment not found")
+    add_monthly_flows(
+        session, [db_payment], db_payment.entries, db_payment.transactions, sign=-1
+    )
+
+    db_payment = session.merge(Payment.model_validate(payment))
+    session.flush()
+    add_monthly_flows(
+        session, [db_payment], db_payment.entries, db_payment.transactions
+    )
+
+    return db_payment
+
+
+def delete_payment(session: Session, payment_id: int) -> None:
+    """
+    Delete a payment with its entries and transactions, reversing its changes to
+    account balances, monthly flows and daily balance changes. Nothing is committed.
+    """
+    db_payment = read_payment(session, payment_id)
+    if db_payment is None:
+        raise ValueError("Payment not found")
+
+    account_amounts: dict[int, Decimal] = {}
+    for transaction in db_payment.transactions:
+        account_amounts[transaction.account_id] = (
+            account_amounts.get(transaction.account_id, Decimal(0)) - transaction.amount
+        )
+    update_account_balances(session, account_amounts, commit=False)
+    add_monthly_flows(
+        session, [db_payment], db_payment.entries, db_payment.transactions, sign=-1
+    )
+    add_daily_changes(session, db_payment.transactions, sign=-1)
+
+    transactions = [*db_payment.transactions]
+    for row in [*db_payment.entries, *transactions, db_payment]:
+        session.delete(row)
+    session.flush()
+    update_running_balances(session, transactions)
+
+
+def import_payment_chunk(
+    session: Session,
+    lines: Sequence[tuple[int, str | bytes]],
+    progress: PaymentImportProgress,
+) -> None:
+    """
+    Parse, validate and store a chunk of NDJSON lines numbered by their position in
+    the file, then commit. Invalid lines are skipped and recorded in `progress`.
+    """
+    numbers = []
+    batch = []
+    for number, line in lines:
+        try:
+            batch.append(PaymentCreateDetailed.model_validate_json(line))
+            numbers.append(number)
+        except ValidationError as err:
+            _record_import_error(progress, number, _format_validation_error(err))
+
+    invalid = set()
+    for error in validate_batch(session, batch):
+        invalid.add(error.index)
+        _record_import_error(progress, numbers[error.index], error.detail)
+    valid = [index for index in range(len(batch)) if index not in invalid]
+
+    if valid:
+        try:
+            create_payments_detailed(session, [batch[index] for index in valid])
+            session.commit()
+        except (SQLAlchemyError, ValueError) as err:
+            session.rollback()
+            for index in valid:
+                _record_import_error(progress, numbers[index], str(err))
+        else:
+            progress.imported += len(valid)
+
+    progress.lines = max((number for number, _ in lines), default=progress.lines)
+
+
+def import_payments(
+    session: Session,
+    lines: Iterable[str | bytes],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Iterator[PaymentImportProgress]:
+    """
+    Import payments from NDJSON lines, committing every `chunk_size` payments.
+    Only one chunk is held in memory, progress is yielded after each chunk.
+    """
+    progress = PaymentImportProgress()
+    chunk: list[tuple[int, str | bytes]] = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        chunk.append((number, line))
+        if len(chunk) >= chunk_size:
+            import_payment_chunk(session, chunk, progress)
+            chunk = []
+            yield progress
+    if chunk:
+        import_payment_chunk(session, chunk, progress)
+        yield progress
+
+
+def _record_import_error(
+    progress: PaymentImportProgress, line: int, detail: str
+) -> None:
+    progress.failed += 1
+    if len(progress.errors) < IMPORT_ERRORS_MAX:
+        progress.errors.append(PaymentImportError(line=line, detail=detail))
+
+
+def _format_validation_error(err: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        for error in err.errors()
+    )
@@ -1,3 +1,5 @@
+from typing import Any
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
@@ -6,7 +8,13 @@ from loguru import logger
 from kayman.core.config import settings
 from kayman.core.db import alembic_upgrade
 from kayman.routers import routers, tags
-from kayman.util import KustomJSONResponse, custom_generate_unique_id
+from kayman.util import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    KustomJSONResponse,
+    custom_generate_unique_id,
+    custom_openapi,
+)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -22,14 +30,25 @@ app = FastAPI(
     },
     generate_unique_id_function=custom_generate_unique_id,
 )
+
+
+def openapi() -> dict[str, Any]:
+    return custom_openapi(app, settings.OPENAPI_FILE)
+
+
+app.openapi = openapi  # type: ignore[method-assign]
 logger.info(f"Applicaiton created in {settings.ENVIRONMENT} environment")
 
+# Any origin is echoed instead of "*", which browsers reject for requests with
+# credentials. Clients authenticate with a bearer token, the only cookie is the
+# read-your-writes pin of kayman.core.db.get_session
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origin_regex=".*",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
 )
 
 # Auto migrate the database on startup
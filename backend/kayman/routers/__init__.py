@@ -5,8 +5,10 @@ from kayman.routers import (
     auth,
     category,
     currency,
+    diagnostics,
     payment,
     psp,
+    report,
     transaction,
     tw_invoice,
 )
@@ -20,6 +22,8 @@ routers = [
     psp.psp_router,
     transaction.txn_router,
     tw_invoice.invoice_router,
+    report.report_router,
+    diagnostics.diagnostics_router,
 ]
 
 tags: list[dict[str, Any]] = [
@@ -31,4 +35,6 @@ tags: list[dict[str, Any]] = [
     psp.tag,
     transaction.tag,
     tw_invoice.tag,
+    report.tag,
+    diagnostics.tag,
 ]
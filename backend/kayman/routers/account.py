@@ -1,24 +1,41 @@
 from collections.abc import Sequence
+from datetime import date, datetime
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic_core import PydanticCustomError
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from kayman.auth import get_client
-from kayman.core.db import get_session
+from kayman.core.db import get_session, get_sync_session, run_sync
 from kayman.crud.account import (
     create_account,
     read_account,
     read_accounts,
+    select_accounts,
     update_accounts,
 )
+from kayman.crud.account_balance import (
+    HISTORY_POINTS_MAX,
+    Granularity,
+    count_periods,
+    read_balance_at,
+    read_balance_history,
+    verify_account_balances,
+)
 from kayman.schemas.account import (
+    AccountBalanceAt,
+    AccountBalancePoint,
     AccountBase,
     AccountCreate,
     AccountRead,
     AccountUpdate,
+    LedgerReport,
 )
+from kayman.util import stream_json_array
 
 TAG_NAME = "Account"
 tag = {
@@ -35,11 +52,11 @@ account_router = APIRouter(
 
 
 @account_router.post("", name="Create Account", response_model=AccountRead)
-def create(
-    *, session: Session = Depends(get_session), account: AccountCreate
+async def create(
+    *, session: AsyncSession = Depends(get_session), account: AccountCreate
 ) -> AccountBase:
     try:
-        return create_account(session, account)
+        return await run_sync(session, create_account, account)
     except IntegrityError as err:
         raise PydanticCustomError(
             "currency_not_found",
@@ -48,9 +65,25 @@ def create(
         ) from err
 
 
+@account_router.get("/ledger", name="Verify Account Balances")
+async def verify_balances(
+    *, session: Session = Depends(get_sync_session), pending: bool = False
+) -> LedgerReport:
+    """
+    Compare account balances with the sum of their transactions
+
+    Pass `pending=true` to only verify accounts whose balance changed since the
+    last run of `python -m kayman.cli verify-balances --pending`, which records
+    verified accounts.
+    """
+    return await run_in_threadpool(verify_account_balances, session, pending)
+
+
 @account_router.get("/{account_id}", name="Read Account", response_model=AccountRead)
-def read(*, session: Session = Depends(get_session), account_id: int) -> AccountBase:
-    account = read_account(session, account_id)
+async def read(
+    *, session: AsyncSession = Depends(get_session), account_id: int
+) -> AccountBase:
+    account = await run_sync(session, read_account, account_id)
     if account is None:
         raise PydanticCustomError(
             "account_not_found",
@@ -61,17 +94,83 @@ def read(*, session: Session = Depends(get_session), account_id: int) -> Account
 
 
 @account_router.get("", name="Read Accounts", response_model=list[AccountRead])
-def reads(*, session: Session = Depends(get_session)) -> Sequence[AccountBase]:
-    return read_accounts(session)
+async def reads(
+    *, session: AsyncSession = Depends(get_session), stream: bool = False
+) -> Sequence[AccountBase] | StreamingResponse:
+    """
+    Read accounts
+
+    Pass `stream=true` to stream the JSON array as it is read from the database.
+    """
+    if stream:
+        return stream_json_array(session, select_accounts(), AccountRead)
+    return await run_sync(session, read_accounts)
 
 
 @account_router.patch(
     "/{account_id}", name="Update Account", response_model=AccountRead
 )
-def update(
-    *, session: Session = Depends(get_session), account_id: int, account: AccountUpdate
+async def update(
+    *,
+    session: AsyncSession = Depends(get_session),
+    account_id: int,
+    account: AccountUpdate,
 ) -> AccountBase:
     try:
-        return update_accounts(session, [account_id], [account])[0]
+        accounts = await run_sync(session, update_accounts, [account_id], [account])
+        return accounts[0]
+    except ValueError as err:
+        raise HTTPException(status_code=404, detail=err.args[0]) from err
+
+
+@account_router.get(
+    "/{account_id}/balance-history", name="Read Account Balance History"
+)
+async def read_history(
+    *,
+    session: AsyncSession = Depends(get_session),
+    account_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    granularity: Granularity = "day",
+) -> list[AccountBalancePoint]:
+    """
+    Balance at the end of each day, week or month from `start` to `end`, both
+    inclusive
+
+    Each point is labeled with the first day of its period. `start` defaults to the
+    day of the first transaction, at most 3660 periods before `end`, which defaults
+    to today. Ranges of more periods are rejected.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if start and count_periods(start, end or date.today(), granularity) > (
+        HISTORY_POINTS_MAX
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {HISTORY_POINTS_MAX} points requested",
+        )
+    try:
+        return await run_sync(
+            session, read_balance_history, account_id, start, end, granularity
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=404, detail=err.args[0]) from err
+
+
+@account_router.get("/{account_id}/balance", name="Read Account Balance At")
+async def read_balance(
+    *,
+    session: AsyncSession = Depends(get_session),
+    account_id: int,
+    at: datetime | None = None,
+) -> AccountBalanceAt:
+    """
+    Balance right after the last transaction at or before `at`, which defaults to
+    now
+    """
+    try:
+        return await run_sync(session, read_balance_at, account_id, at)
     except ValueError as err:
         raise HTTPException(status_code=404, detail=err.args[0]) from err
@@ -1,16 +1,27 @@
 from collections.abc import Sequence
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from kayman.auth import get_client
-from kayman.core.db import get_session
+from kayman.core.db import get_session, get_sync_session, run_sync
+from kayman.crud.category import (
+    create_category,
+    read_category_rollup,
+    read_category_subtree,
+    read_category_tree,
+    update_category,
+)
 from kayman.schemas.category import (
     Category,
     CategoryBase,
     CategoryCreate,
     CategoryRead,
     CategoryReadWithChildren,
+    CategoryRollup,
 )
 
 TAG_NAME = "Category"
@@ -28,52 +39,64 @@ category_router = APIRouter(
 
 
 @category_router.post("", name="Create Category", response_model=CategoryRead)
-def create(
-    *, session: Session = Depends(get_session), category: CategoryCreate
+async def create(
+    *, session: AsyncSession = Depends(get_session), category: CategoryCreate
 ) -> CategoryBase:
-    db_category = Category.model_validate(category)
-    session.add(db_category)
-    session.commit()
-    session.refresh(db_category)
-    return db_category
+    return await run_sync(session, create_category, category)
 
 
 @category_router.get(
     "", name="Read Categories", response_model=list[CategoryReadWithChildren]
 )
-def reads(*, session: Session = Depends(get_session)) -> Sequence[CategoryBase]:
-    categories = session.exec(
-        select(Category).where(
-            # https://github.com/fastapi/sqlmodel/issues/109
-            Category.parent_id == None,  # noqa E711 Comparison to `None` should be `cond is None`.
-        )
-    ).all()
-    return categories
+async def reads(
+    *, session: AsyncSession = Depends(get_session)
+) -> Sequence[CategoryBase]:
+    return await run_sync(session, read_category_tree)
+
+
+@category_router.get("/rollup", name="Read Category Rollup")
+async def rollup(
+    *,
+    session: Session = Depends(get_sync_session),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency: str | None = None,
+) -> Sequence[CategoryRollup]:
+    """
+    Entry count and amount per category and currency, for payments from `start`
+    (inclusive) to `end` (exclusive)
+
+    `count` and `amount` cover the category's own entries, `total_count` and
+    `total_amount` include all its subcategories.
+    """
+    return await run_in_threadpool(read_category_rollup, session, start, end, currency)
 
 
 @category_router.get(
     "/{id}", name="Read Category", response_model=CategoryReadWithChildren
 )
-def read(*, session: Session = Depends(get_session), id: int) -> CategoryBase:
-    category = session.get(Category, id)
+async def read(
+    *, session: AsyncSession = Depends(get_session), id: int
+) -> CategoryBase:
+    category = await run_sync(session, read_category_subtree, id)
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
 
 @category_router.patch("", name="Update Category", response_model=CategoryRead)
-def update(
-    *, session: Session = Depends(get_session), category: Category
+async def update(
+    *, session: AsyncSession = Depends(get_session), category: Category
 ) -> CategoryBase:
-    session.merge(category)
-    session.commit()
-    session.refresh(category)
-    return category
+    try:
+        return await run_sync(session, update_category, category)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=err.args[0]) from err
 
 
 # TODO: Think about how this should work
 # @category_router.delete("/{id}")
-# def delete_category(*, session: Session = Depends(get_session), id: int):
+# def delete_category(*, session: AsyncSession = Depends(get_session), id: int):
 #     category = session.query(Category).get(id)
 #     if category is None:
 #         raise HTTPException(status_code=404, detail="Category not found")
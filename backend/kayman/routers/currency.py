@@ -1,13 +1,14 @@
 from collections.abc import Sequence
 
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Depends
 from fastapi.openapi.models import Example
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from kayman.auth import get_client
-from kayman.core.db import get_session
+from kayman.core.db import get_session, run_sync
 from kayman.crud.currency import create_currency, read_currencies
 from kayman.schemas.currency import Currency
+from kayman.util import request_examples
 
 TAG_NAME = "Currency"
 tag = {
@@ -22,8 +23,10 @@ currency_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-EXAMPLES = {
-    "create": {
+
+@request_examples(TAG_NAME, "Create Currency")
+def create_examples() -> dict[str, Example]:
+    return {
         "United States Dollar": Example(
             {
                 "summary": "United States Dollar",
@@ -49,18 +52,17 @@ EXAMPLES = {
             }
         ),
     }
-}
 
 
 @currency_router.post("", name="Create Currency")
-def create(
+async def create(
     *,
-    session: Session = Depends(get_session),
-    currency: Currency = Body(openapi_examples=EXAMPLES["create"]),
+    session: AsyncSession = Depends(get_session),
+    currency: Currency,
 ) -> Currency:
-    return create_currency(session, currency)
+    return await run_sync(session, create_currency, currency)
 
 
 @currency_router.get("", name="Read Currencies", response_model=list[Currency])
-def reads(*, session: Session = Depends(get_session)) -> Sequence[Currency]:
-    return read_currencies(session)
+async def reads(*, session: AsyncSession = Depends(get_session)) -> Sequence[Currency]:
+    return await run_sync(session, read_currencies)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.pool import QueuePool
+
+from kayman.auth import get_client
+from kayman.core.db import async_engine, async_pool_stats
+from kayman.schemas.diagnostics import PoolStatus
+
+TAG_NAME = "Diagnostics"
+tag = {
+    "name": TAG_NAME,
+    "description": "Inspect the state of the running service",
+}
+
+diagnostics_router = APIRouter(
+    prefix="/diagnostics",
+    tags=[TAG_NAME],
+    dependencies=[Depends(get_client)],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@diagnostics_router.get("/pool", name="Read Connection Pool Status")
+async def read_pool() -> PoolStatus:
+    """
+    Connections of the database pool serving requests
+
+    Counters and the checkout wait histogram accumulate since the service started.
+    `waits` counts checkouts that found every connection in use and had to wait
+    for one to be returned.
+    """
+    pool = async_engine.pool
+    if not isinstance(pool, QueuePool):
+        raise HTTPException(status_code=501, detail="Pool status is not available")
+    return async_pool_stats.status(pool)
@@ -1,29 +1,44 @@
-from collections.abc import Sequence
-from datetime import date
+from collections.abc import Iterator, Sequence
+from datetime import date, datetime
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from anyio import from_thread
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.openapi.models import Example
+from fastapi.responses import StreamingResponse
+from loguru import logger
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from kayman.auth import get_client
-from kayman.core.db import get_session
-from kayman.crud.payment import (
-    create_payment,
-    read_payment,
-    read_payments,
+from kayman.core.db import get_session, get_sync_session, run_sync
+from kayman.crud.payment import read_payment, read_payments, select_payments
+from kayman.logics.payment import (
+    IMPORT_CHUNK_SIZE,
+    create_payments_detailed,
+    delete_payment,
+    import_payments,
+    update_payment,
+    validate_batch,
+    validate_total,
 )
-from kayman.crud.payment_entry import create_payment_entries
-from kayman.crud.transaction import create_transactions
-from kayman.logics.account import update_balances_with_transactions
-from kayman.logics.payment import validate_total
-from kayman.schemas.api_models import PaymentCreateDetailed, PaymentReadDetailed
-from kayman.schemas.payment import (
-    Payment,
-    PaymentBase,
-    PaymentEntryBase,
-    PaymentRead,
+from kayman.schemas.api_models import (
+    PaymentBatchError,
+    PaymentCreateBatchResponse,
+    PaymentCreateDetailed,
+    PaymentImportProgress,
+    PaymentReadDetailed,
+)
+from kayman.schemas.payment import PaymentBase, PaymentRead
+from kayman.util import (
+    PAGE_SIZE_DEFAULT,
+    PageLimit,
+    decode_cursor,
+    paginate,
+    request_examples,
+    split_lines,
+    stream_json_array,
 )
-from kayman.schemas.transaction import TransactionBase
 
 TAG_NAME = "Payment"
 tag = {
@@ -31,6 +46,8 @@ tag = {
     "description": "Create and edit payment records",
 }
 
+BATCH_SIZE_MAX = 10000
+
 payment_router = APIRouter(
     prefix="/payments",
     tags=[TAG_NAME],
@@ -38,8 +55,10 @@ payment_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-EXAMPLES = {
-    "create": {
+
+@request_examples(TAG_NAME, "Create Payment")
+def create_examples() -> dict[str, Example]:
+    return {
         "Expense": Example(
             {
                 "summary": "Expense",
@@ -260,14 +279,13 @@ EXAMPLES = {
             }
         ),
     }
-}
 
 
 @payment_router.post("", name="Create Payment", response_model=PaymentReadDetailed)
-def create(
+async def create(
     *,
-    session: Session = Depends(get_session),
-    body: PaymentCreateDetailed = Body(openapi_examples=EXAMPLES["create"]),
+    session: Session = Depends(get_sync_session),
+    body: PaymentCreateDetailed,
 ) -> PaymentBase:
     # Validate total
     try:
@@ -275,84 +293,191 @@ def create(
     except ValueError as err:
         raise HTTPException(status_code=400, detail=err.args[0]) from err
 
-    # Store payment
-    db_payment = create_payment(session, body.payment, commit=False)
-    payment_id = PaymentRead.model_validate(db_payment).id
-
-    # Store entries
-    entries = []
-    for entry_index, entry_create in enumerate(body.entries):
-        entries.append(
-            PaymentEntryBase.model_validate(
-                entry_create,
-                update={
-                    "payment_id": payment_id,
-                    "index": entry_index,
-                },
-            )
-        )
-    create_payment_entries(session, entries, commit=False)
-
-    # Store Transactions
-    transactions = []
-    for transaction_index, transaction in enumerate(body.transactions):
-        transactions.append(
-            TransactionBase.model_validate(
-                transaction,
-                update={
-                    "payment_id": payment_id,
-                    "index": transaction_index,
-                },
-            )
-        )
-    create_transactions(session, transactions, commit=False)
-
-    # Modify account balance
-    update_balances_with_transactions(session, body.transactions, commit=False)
+    # Store payment, entries and transactions, and modify account balance
+    try:
+        db_payments = await run_in_threadpool(create_payments_detailed, session, [body])
+        db_payment = db_payments[0]
+    except ValueError as err:
+        raise HTTPException(status_code=404, detail=err.args[0]) from err
 
     # Read the new payment
-    new_payment = read_payment(session, payment_id)
+    new_payment = (
+        await run_in_threadpool(read_payment, session, db_payment.id)
+        if db_payment.id
+        else None
+    )
     if new_payment is None:
         raise HTTPException(status_code=500, detail="Failed to create payment")
 
     # Commit all changes
-    session.commit()
+    await run_in_threadpool(session.commit)
 
     return new_payment
 
 
+@payment_router.post(
+    "/batch",
+    name="Create Payments",
+    response_model=PaymentCreateBatchResponse,
+    responses={
+        400: {
+            "description": "Some payments in the batch are invalid",
+            "model": dict[str, list[PaymentBatchError]],
+        }
+    },
+)
+async def create_batch(
+    *,
+    session: Session = Depends(get_sync_session),
+    body: list[PaymentCreateDetailed] = Body(max_length=BATCH_SIZE_MAX),
+) -> PaymentCreateBatchResponse:
+    """
+    Create payments in one database transaction
+
+    The batch is validated as a whole before anything is stored. If any payment is
+    invalid, nothing is created and every error is reported with the index of the
+    payment in the batch.
+    """
+    # Validating and storing thousands of payments is CPU-bound, keep it off the
+    # event loop
+    errors = await run_in_threadpool(validate_batch, session, body)
+    if errors:
+        raise HTTPException(
+            status_code=400, detail=[error.model_dump() for error in errors]
+        )
+
+    db_payments = await run_in_threadpool(create_payments_detailed, session, body)
+    payment_ids = [payment.id for payment in db_payments if payment.id is not None]
+    await run_in_threadpool(session.commit)
+
+    return PaymentCreateBatchResponse(payment_ids=payment_ids)
+
+
+@payment_router.post(
+    "/import",
+    name="Import Payments",
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+            "required": True,
+        }
+    },
+)
+async def import_(
+    *,
+    session: Session = Depends(get_sync_session),
+    request: Request,
+    chunk_size: int = Query(default=IMPORT_CHUNK_SIZE, ge=1, le=BATCH_SIZE_MAX),
+) -> PaymentImportProgress:
+    """
+    Import payments from newline-delimited JSON
+
+    Each line is a payment in the same format as Create Payment. The body is read as
+    a stream and stored in chunks of `chunk_size` payments, each chunk committed on
+    its own. Invalid lines are skipped and reported with their line number.
+    """
+    # Parsing and storing payments is CPU-bound, keep it off the event loop
+    progress = await run_in_threadpool(_import_body, session, request, chunk_size)
+    logger.info(
+        f"Imported {progress.imported} payments from {progress.lines} lines, "
+        f"{progress.failed} failed"
+    )
+    return progress
+
+
 @payment_router.get(
     "/{payment_id}", name="Read Payment", response_model=PaymentReadDetailed
 )
-def read(*, session: Session = Depends(get_session), payment_id: int) -> PaymentBase:
-    payment = read_payment(session, payment_id)
+async def read(
+    *, session: AsyncSession = Depends(get_session), payment_id: int
+) -> PaymentBase:
+    payment = await run_sync(session, read_payment, payment_id)
     if payment is None:
         raise HTTPException(status_code=404, detail="Payment not found")
     return payment
 
 
 @payment_router.get("", name="Read Payments", response_model=list[PaymentReadDetailed])
-def reads(
+async def reads(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
+    response: Response,
     payment_date: date | None = None,
     category_id: int | None = None,
-) -> Sequence[PaymentBase]:
-    return read_payments(session, payment_date, category_id)
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    limit: PageLimit = PAGE_SIZE_DEFAULT,
+    stream: bool = False,
+) -> Sequence[PaymentBase] | StreamingResponse:
+    """
+    Read payments ordered by timestamp
+
+    Payments are paginated, pass the `X-Next-Cursor` response header as `cursor`
+    to read the next page. The header is absent on the last page.
+
+    Pass `stream=true` to stream all payments after `cursor` instead of a page,
+    e.g. for exporting the whole ledger. `limit` is ignored when streaming.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=err.args[0]) from err
+    if stream:
+        return stream_json_array(
+            session,
+            select_payments(payment_date, category_id, start, end, after),
+            PaymentReadDetailed,
+        )
+    payments = await run_sync(
+        session,
+        read_payments,
+        payment_date=payment_date,
+        category_id=category_id,
+        start=start,
+        end=end,
+        after=after,
+        limit=limit + 1,
+    )
+    return paginate(response, payments, limit)
 
 
 @payment_router.patch("", name="Update Payment", response_model=PaymentRead)
-def update(*, session: Session = Depends(get_session), payment: Payment) -> PaymentBase:
-    session.merge(payment)
-    session.commit()
-    session.refresh(payment)
-    return payment
+async def update(
+    *, session: Session = Depends(get_sync_session), payment: PaymentRead
+) -> PaymentBase:
+    try:
+        db_payment = await run_in_threadpool(update_payment, session, payment)
+    except ValueError as err:
+        raise HTTPException(status_code=404, detail=err.args[0]) from err
+    await run_in_threadpool(session.commit)
+    return db_payment
 
 
 @payment_router.delete("/{id}", name="Delete Payment")
-def delete(*, session: Session = Depends(get_session), id: int) -> None:
-    payment = session.get(Payment, id)
-    if payment is None:
-        raise HTTPException(status_code=404, detail="Payment not found")
-    session.delete(payment)
-    session.commit()
+async def delete(*, session: Session = Depends(get_sync_session), id: int) -> None:
+    try:
+        await run_in_threadpool(delete_payment, session, id)
+    except ValueError as err:
+        raise HTTPException(status_code=404, detail=err.args[0]) from err
+    await run_in_threadpool(session.commit)
+
+
+def _import_body(
+    session: Session, request: Request, chunk_size: int
+) -> PaymentImportProgress:
+    progress = PaymentImportProgress()
+    lines = split_lines(_iter_body(request))
+    for chunk_progress in import_payments(session, lines, chunk_size=chunk_size):
+        progress = chunk_progress
+    return progress
+
+
+def _iter_body(request: Request) -> Iterator[bytes]:
+    """Read the request body stream from sync code run in the threadpool"""
+    stream = request.stream()
+    while True:
+        try:
+            yield from_thread.run(anext, stream)
+        except StopAsyncIteration:
+            return
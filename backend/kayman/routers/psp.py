@@ -1,10 +1,12 @@
 from collections.abc import Sequence
 
 from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from kayman.auth import get_client
-from kayman.core.db import get_session
+from kayman.core.db import get_session, run_sync
+from kayman.crud.psp import create_psp
 from kayman.schemas.psp import PSP, PSPBase, PSPCreate, PSPRead
 
 TAG_NAME = "Payment Service Provider"
@@ -22,15 +24,13 @@ psp_router = APIRouter(
 
 
 @psp_router.post("", name="Create Payment Service Provider", response_model=PSPRead)
-def create(*, session: Session = Depends(get_session), psp: PSPCreate) -> PSPBase:
-    db_psp = PSP.model_validate(psp)
-    session.add(db_psp)
-    session.commit()
-    session.refresh(db_psp)
-    return db_psp
+async def create(
+    *, session: AsyncSession = Depends(get_session), psp: PSPCreate
+) -> PSPBase:
+    return await run_sync(session, create_psp, psp)
 
 
 @psp_router.get("", name="Read Payment Service Providers", response_model=list[PSPRead])
-def reads(*, session: Session = Depends(get_session)) -> Sequence[PSPBase]:
-    psps = session.exec(select(PSP)).all()
+async def reads(*, session: AsyncSession = Depends(get_session)) -> Sequence[PSPBase]:
+    psps = (await session.exec(select(PSP))).all()
     return psps
@@ -0,0 +1,62 @@
+from collections.abc import Sequence
+from datetime import date
+
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from kayman.auth import get_client
+from kayman.core.db import get_sync_session
+from kayman.crud.monthly_flow import (
+    read_monthly_account_flows,
+    read_monthly_category_flows,
+)
+from kayman.schemas.monthly_flow import MonthlyAccountFlow, MonthlyCategoryFlow
+from kayman.schemas.payment import PaymentType
+
+TAG_NAME = "Report"
+tag = {
+    "name": TAG_NAME,
+    "description": "Summarize payments over time",
+}
+
+report_router = APIRouter(
+    prefix="/reports",
+    tags=[TAG_NAME],
+    dependencies=[Depends(get_client)],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@report_router.get("/monthly/categories", name="Read Monthly Category Flows")
+async def read_category_flows(
+    *,
+    session: Session = Depends(get_sync_session),
+    start: date | None = None,
+    end: date | None = None,
+    type: PaymentType | None = None,
+) -> Sequence[MonthlyCategoryFlow]:
+    """
+    Entry amount and count per month, category, currency and payment type, for
+    months from `start` (inclusive) to `end` (exclusive)
+    """
+    return await run_in_threadpool(
+        read_monthly_category_flows, session, start, end, type
+    )
+
+
+@report_router.get("/monthly/accounts", name="Read Monthly Account Flows")
+async def read_account_flows(
+    *,
+    session: Session = Depends(get_sync_session),
+    start: date | None = None,
+    end: date | None = None,
+    account_id: int | None = None,
+) -> Sequence[MonthlyAccountFlow]:
+    """
+    Transaction amount and count per month, account and payment type, for months
+    from `start` (inclusive) to `end` (exclusive)
+    """
+    return await run_in_threadpool(
+        read_monthly_account_flows, session, start, end, account_id
+    )
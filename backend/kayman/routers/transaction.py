@@ -1,12 +1,28 @@
 from collections.abc import Sequence
+from datetime import datetime
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from kayman.auth import get_client
-from kayman.core.db import get_session
-from kayman.crud.transaction import get_transactions
+from kayman.core.db import get_session, run_sync
+from kayman.crud.transaction import (
+    ReconcileQueue,
+    count_unreconciled_transactions,
+    get_transactions,
+    get_unreconciled_transactions,
+    select_transactions,
+)
 from kayman.schemas.transaction import TransactionBase, TransactionRead
+from kayman.util import (
+    PAGE_SIZE_DEFAULT,
+    TOTAL_COUNT_HEADER,
+    PageLimit,
+    decode_cursor,
+    paginate,
+    stream_json_array,
+)
 
 TAG_NAME = "Transaction"
 tag = {
@@ -23,7 +39,90 @@ txn_router = APIRouter(
 
 
 @txn_router.get("", name="Read Transactions", response_model=list[TransactionRead])
-def reads(
-    *, session: Session = Depends(get_session), account_id: int | None = None
+async def reads(
+    *,
+    session: AsyncSession = Depends(get_session),
+    response: Response,
+    account_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    limit: PageLimit = PAGE_SIZE_DEFAULT,
+    stream: bool = False,
+) -> Sequence[TransactionBase] | StreamingResponse:
+    """
+    Read transactions ordered by timestamp
+
+    Transactions are paginated like `Read Payments`, pass the `X-Next-Cursor`
+    response header as `cursor` to read the next page. The header is absent on the
+    last page.
+
+    Pass `stream=true` to stream all transactions after `cursor` instead of a page,
+    e.g. for exporting all transactions. `limit` is ignored when streaming.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=err.args[0]) from err
+    if stream:
+        return stream_json_array(
+            session,
+            select_transactions(account_id, start, end, after),
+            TransactionRead,
+        )
+    txns = await run_sync(
+        session,
+        get_transactions,
+        account_id=account_id,
+        start=start,
+        end=end,
+        after=after,
+        limit=limit + 1,
+    )
+    return paginate(response, txns, limit)
+
+
+@txn_router.get(
+    "/unreconciled",
+    name="Read Unreconciled Transactions",
+    response_model=list[TransactionRead],
+)
+async def reads_unreconciled(
+    *,
+    session: AsyncSession = Depends(get_session),
+    response: Response,
+    queue: ReconcileQueue = "account",
+    account_id: int | None = None,
+    psp_id: int | None = None,
+    cursor: str | None = None,
+    limit: PageLimit = PAGE_SIZE_DEFAULT,
 ) -> Sequence[TransactionBase]:
-    return get_transactions(session, account_id)
+    """
+    Read transactions to reconcile with account statements, or with payment service
+    providers for `queue=psp`, ordered by timestamp
+
+    Transactions are paginated like `Read Transactions`. The `X-Total-Count`
+    response header is the number of transactions left in the queue.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=err.args[0]) from err
+    txns = await run_sync(
+        session,
+        get_unreconciled_transactions,
+        queue=queue,
+        account_id=account_id,
+        psp_id=psp_id,
+        after=after,
+        limit=limit + 1,
+    )
+    count = await run_sync(
+        session,
+        count_unreconciled_transactions,
+        queue=queue,
+        account_id=account_id,
+        psp_id=psp_id,
+    )
+    response.headers[TOTAL_COUNT_HEADER] = str(count)
+    return paginate(response, txns, limit)
@@ -1,7 +1,9 @@
 from collections.abc import Sequence
 
 from fastapi import APIRouter, Depends, HTTPException, Path
-from sqlmodel import Session, select
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from kayman.auth import get_client
 from kayman.core.db import get_session
@@ -19,6 +21,7 @@ from kayman.schemas.tw_invoice import (
     InvoiceWrite,
     InvoiceWriteResponse,
 )
+from kayman.util import stream_json_array
 
 TAG_NAME = "Taiwan E-Invoice"
 tag = {
@@ -40,8 +43,8 @@ invoice_router = APIRouter(
 
 
 @invoice_router.post("", name="Create or Update Invoices")
-def create_or_update(
-    *, session: Session = Depends(get_session), invoices: list[InvoiceWrite]
+async def create_or_update(
+    *, session: AsyncSession = Depends(get_session), invoices: list[InvoiceWrite]
 ) -> InvoiceWriteResponse:
     """
     Create or update invoices
@@ -52,13 +55,13 @@ def create_or_update(
     created = []
     updated = []
     for invoice in invoices:
-        db_invoice = session.get(Invoice, invoice.number)
+        db_invoice = await session.get(Invoice, invoice.number)
         if not db_invoice:
             # Create new invoice
             db_invoice = Invoice.model_validate(invoice)
             session.add(db_invoice)
-            session.commit()
-            session.refresh(db_invoice)
+            await session.commit()
+            await session.refresh(db_invoice)
             created.append(db_invoice)
             session.expunge(db_invoice)
         else:
@@ -72,7 +75,7 @@ def create_or_update(
             if not modified:
                 continue
             session.add(db_invoice)
-            session.commit()
+            await session.commit()
             modified["number"] = invoice.number
             updated.append(InvoiceUpdated.parse_obj(modified))
     response = InvoiceWriteResponse(created=created, updated=updated)
@@ -80,23 +83,34 @@ def create_or_update(
 
 
 @invoice_router.get("", name="Read Invoices", response_model=list[InvoiceRead])
-def reads(*, session: Session = Depends(get_session)) -> Sequence[InvoiceBase]:
-    invoices = session.exec(select(Invoice)).all()
+async def reads(
+    *, session: AsyncSession = Depends(get_session), stream: bool = False
+) -> Sequence[InvoiceBase] | StreamingResponse:
+    """
+    Read invoices
+
+    Pass `stream=true` to stream the JSON array as it is read from the database.
+    """
+    if stream:
+        return stream_json_array(session, select(Invoice), InvoiceRead)
+    invoices = (await session.exec(select(Invoice))).all()
     return invoices
 
 
 @invoice_router.patch("", name="Update Invoice", response_model=InvoiceUpdated)
-def update(*, session: Session = Depends(get_session), invoice: Invoice) -> InvoiceBase:
-    session.merge(invoice)
-    session.commit()
-    session.refresh(invoice)
-    return invoice
+async def update(
+    *, session: AsyncSession = Depends(get_session), invoice: Invoice
+) -> InvoiceBase:
+    db_invoice = await session.merge(invoice)
+    await session.commit()
+    await session.refresh(db_invoice)
+    return db_invoice
 
 
 @invoice_router.post("/{number}", name="Create or Update Invoice Details")
-def create_or_update_details(
+async def create_or_update_details(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     number: str = Path(
         openapi_examples={
             "normal": {
@@ -113,13 +127,13 @@ def create_or_update_details(
     New details will be returned with all fields, while existing details will be
     returned with only updated fields.
     """
-    db_invoice = session.get(Invoice, number)
+    db_invoice = await session.get(Invoice, number)
     if not db_invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     created = []
     updated = []
     for detail in invoice_details:
-        db_detail = session.get(
+        db_detail = await session.get(
             InvoiceDetail, {"invoice_number": number, "row_number": detail.row_number}
         )
         if not db_detail:
@@ -127,8 +141,8 @@ def create_or_update_details(
             detail.invoice_number = number
             db_detail = InvoiceDetail.model_validate(detail)
             session.add(db_detail)
-            session.commit()
-            session.refresh(db_detail)
+            await session.commit()
+            await session.refresh(db_detail)
             created.append(db_detail)
             session.expunge(db_detail)
         else:
@@ -142,7 +156,7 @@ def create_or_update_details(
             if not modified:
                 continue
             session.add(db_detail)
-            session.commit()
+            await session.commit()
             modified["invoice_number"] = number
             modified["row_number"] = detail.row_number
             updated.append(InvoiceDetailUpdated.parse_obj(modified))
@@ -153,10 +167,12 @@ def create_or_update_details(
 @invoice_router.get(
     "/{number}", name="Read Invoice Details", response_model=list[InvoiceDetailRead]
 )
-def read_details(
-    *, session: Session = Depends(get_session), number: str
+async def read_details(
+    *, session: AsyncSession = Depends(get_session), number: str
 ) -> Sequence[InvoiceDetailBase]:
-    details = session.exec(
-        select(InvoiceDetail).where(InvoiceDetail.invoice_number == number)
+    details = (
+        await session.exec(
+            select(InvoiceDetail).where(InvoiceDetail.invoice_number == number)
+        )
     ).all()
     return details
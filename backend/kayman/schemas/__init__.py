@@ -1,7 +1,8 @@
-from kayman.schemas.account import Account
-from kayman.schemas.category import Category
+from kayman.schemas.account import Account, AccountDailyChange
+from kayman.schemas.category import Category, CategoryClosure
 from kayman.schemas.clients import Client, Token
 from kayman.schemas.currency import Currency
+from kayman.schemas.monthly_flow import MonthlyAccountFlow, MonthlyCategoryFlow
 from kayman.schemas.payment import Payment, PaymentEntry
 from kayman.schemas.psp import PSP
 from kayman.schemas.transaction import Transaction
@@ -9,12 +10,16 @@ from kayman.schemas.tw_invoice import Invoice, InvoiceCarrier, InvoiceDetail
 
 __all__ = [
     "Account",
+    "AccountDailyChange",
     "Category",
+    "CategoryClosure",
     "Client",
     "Currency",
     "Invoice",
     "InvoiceCarrier",
     "InvoiceDetail",
+    "MonthlyAccountFlow",
+    "MonthlyCategoryFlow",
     "Payment",
     "PaymentEntry",
     "PSP",
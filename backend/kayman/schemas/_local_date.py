@@ -0,0 +1,30 @@
+from datetime import UTC, date, datetime
+from typing import Any
+from zoneinfo import ZoneInfo
+
+
+def as_aware(timestamp: datetime) -> datetime:
+    """Take naive timestamps as UTC"""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=UTC)
+    return timestamp
+
+
+def to_local_date(timestamp: datetime, timezone: str) -> date:
+    """
+    Date of the timestamp in its own timezone
+
+    Naive timestamps are taken as UTC, so the date matches the one the database
+    derives from the stored instant with `"timestamp" AT TIME ZONE timezone`.
+    """
+    return as_aware(timestamp).astimezone(ZoneInfo(timezone)).date()
+
+
+def set_local_date(_mapper: Any, _connection: Any, target: Any) -> None:
+    """
+    Mapper event to store timestamps as UTC when naive, and keep `local_date` and
+    `local_month` in sync with them
+    """
+    target.timestamp = as_aware(target.timestamp)
+    target.local_date = to_local_date(target.timestamp, target.timezone)
+    target.local_month = target.local_date.replace(day=1)
@@ -1,3 +1,4 @@
+from datetime import date, datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
@@ -17,6 +18,10 @@ class Account(AccountBase, table=True):
     __tablename__ = "account"
     id: int | None = Field(primary_key=True, default=None)
     balance: Decimal
+    # Bumped by every balance change, and recorded as verified once a check of the
+    # balance against the transactions passed
+    ledger_version: int = Field(default=0)
+    verified_version: int = Field(default=0)
     currency: "Currency" = Relationship(back_populates="accounts")
     transactions: list["Transaction"] = Relationship(back_populates="account")
 
@@ -32,3 +37,36 @@ class AccountRead(AccountBase):
 
 class AccountUpdate(SQLModel):
     name: str | None = None
+
+
+class AccountDailyChange(SQLModel, table=True):
+    """Net change of an account balance on a day with transactions"""
+
+    __tablename__ = "account_daily_change"
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    day: date = Field(primary_key=True)  # Local date of the transactions
+    amount: Decimal
+    count: int
+
+
+class AccountBalancePoint(SQLModel):
+    start: date  # First day of the period
+    balance: Decimal  # Balance at the end of the period
+
+
+class AccountBalanceAt(SQLModel):
+    timestamp: datetime
+    balance: Decimal
+    transaction_id: int | None  # Last transaction at or before the timestamp
+
+
+class AccountDrift(SQLModel):
+    account_id: int
+    balance: Decimal  # Stored balance
+    ledger_balance: Decimal  # Sum of the account's transactions
+    drift: Decimal  # Stored balance minus ledger balance
+
+
+class LedgerReport(SQLModel):
+    checked: int  # Number of accounts verified
+    drifts: list[AccountDrift]
@@ -24,3 +24,32 @@ class PaymentCreateDetailed(SQLModel):
     payment: PaymentCreate
     transactions: list[TransactionCreate]
     entries: list[PaymentEntryCreate]
+
+
+class PaymentBatchError(SQLModel):
+    """Points to the payment in a batch that failed validation."""
+
+    index: int
+    detail: str
+
+
+class PaymentCreateBatchResponse(SQLModel):
+    """Ids of created payments, in the order of the batch."""
+
+    payment_ids: list[int]
+
+
+class PaymentImportError(SQLModel):
+    """Points to the line of an import that failed."""
+
+    line: int
+    detail: str
+
+
+class PaymentImportProgress(SQLModel):
+    """Running totals of an import, with the first errors encountered."""
+
+    lines: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: list[PaymentImportError] = []
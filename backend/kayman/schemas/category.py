@@ -1,6 +1,21 @@
-from typing import TYPE_CHECKING, Optional
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Optional
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import Connection, event
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import get_history
+from sqlmodel import (
+    Field,
+    Index,
+    Relationship,
+    SQLModel,
+    col,
+    delete,
+    insert,
+    literal,
+    select,
+    true,
+)
 
 if TYPE_CHECKING:
     from kayman.schemas.payment import PaymentEntry
@@ -24,6 +39,85 @@ class Category(CategoryBase, table=True):
     sub_categories: list["Category"] = Relationship(back_populates="parent_category")
 
 
+class CategoryClosure(SQLModel, table=True):
+    """Every (ancestor, descendant) pair of the category tree, each category included
+
+    Kept in sync by the mapper events below, so a subtree is one indexed join on
+    `ancestor_id`.
+    """
+
+    __tablename__ = "category_closure"
+    __table_args__ = (Index("ix_category_closure_descendant_id", "descendant_id"),)
+    ancestor_id: int = Field(
+        foreign_key="category.id", primary_key=True, ondelete="CASCADE"
+    )
+    descendant_id: int = Field(
+        foreign_key="category.id", primary_key=True, ondelete="CASCADE"
+    )
+    depth: int  # 0 for the category itself, 1 for its children, and so on
+
+
+CLOSURE_COLUMNS = ["ancestor_id", "descendant_id", "depth"]
+
+
+def insert_closure(_mapper: Any, connection: Connection, target: Category) -> None:
+    """Mapper event to add a new category below the ancestors of its parent"""
+    connection.execute(
+        insert(CategoryClosure).from_select(
+            CLOSURE_COLUMNS,
+            select(
+                col(CategoryClosure.ancestor_id),
+                literal(target.id),
+                col(CategoryClosure.depth) + 1,
+            )
+            .where(CategoryClosure.descendant_id == target.parent_id)
+            .union_all(select(literal(target.id), literal(target.id), literal(0))),
+        )
+    )
+
+
+def move_closure(_mapper: Any, connection: Connection, target: Category) -> None:
+    """Mapper event to move the subtree of a category whose parent changed"""
+    if not get_history(target, "parent_id").has_changes():
+        return
+    subtree = select(CategoryClosure.descendant_id).where(
+        CategoryClosure.ancestor_id == target.id
+    )
+
+    # Detach the subtree from the ancestors of the old parent
+    connection.execute(
+        delete(CategoryClosure).where(
+            col(CategoryClosure.descendant_id).in_(subtree),
+            col(CategoryClosure.ancestor_id).not_in(subtree),
+        )
+    )
+
+    # Attach it to the ancestors of the new parent
+    if target.parent_id is None:
+        return
+    ancestor = aliased(CategoryClosure)
+    descendant = aliased(CategoryClosure)
+    connection.execute(
+        insert(CategoryClosure).from_select(
+            CLOSURE_COLUMNS,
+            select(
+                ancestor.ancestor_id,
+                descendant.descendant_id,
+                ancestor.depth + descendant.depth + 1,
+            )
+            .join(descendant, true())
+            .where(
+                ancestor.descendant_id == target.parent_id,
+                descendant.ancestor_id == target.id,
+            ),
+        )
+    )
+
+
+event.listen(Category, "after_insert", insert_closure)
+event.listen(Category, "after_update", move_closure)
+
+
 class CategoryCreate(CategoryBase):
     pass
 
@@ -33,4 +127,15 @@ class CategoryRead(CategoryBase):
 
 
 class CategoryReadWithChildren(CategoryRead):
-    sub_categories: list[CategoryRead] | None = None
+    sub_categories: list["CategoryReadWithChildren"] | None = None
+
+
+class CategoryRollup(SQLModel):
+    """Entries of a category in one currency, alone and with all its descendants"""
+
+    category_id: int
+    currency_code: str
+    count: int
+    amount: Decimal
+    total_count: int
+    total_amount: Decimal
@@ -0,0 +1,23 @@
+from sqlmodel import SQLModel
+
+
+class PoolWaitBucket(SQLModel):
+    le: float | None  # Upper bound in seconds, None for no bound
+    count: int
+
+
+class PoolStatus(SQLModel):
+    """Connection pool status of the request engine"""
+
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    connects: int
+    checkouts: int
+    checkins: int
+    invalidations: int
+    waits: int
+    timeouts: int
+    wait_seconds: float
+    wait_histogram: list[PoolWaitBucket]
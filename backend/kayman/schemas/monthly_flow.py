@@ -0,0 +1,34 @@
+from datetime import date
+from decimal import Decimal
+
+import sqlmodel
+from sqlmodel import Column, Field, SQLModel
+
+from kayman.schemas.payment import PaymentType
+
+
+class MonthlyCategoryFlow(SQLModel, table=True):
+    """Sum of the payment entries of a category in a month"""
+
+    __tablename__ = "monthly_category_flow"
+    month: date = Field(primary_key=True)  # Local month of the payments
+    category_id: int = Field(foreign_key="category.id", primary_key=True)
+    currency_code: str = Field(foreign_key="currency.code", primary_key=True)
+    type: PaymentType = Field(
+        sa_column=Column(sqlmodel.Enum(PaymentType), primary_key=True)
+    )
+    amount: Decimal  # Sum of amount * quantity
+    count: int
+
+
+class MonthlyAccountFlow(SQLModel, table=True):
+    """Sum of the transactions of an account in a month"""
+
+    __tablename__ = "monthly_account_flow"
+    month: date = Field(primary_key=True)  # Local month of the transactions
+    account_id: int = Field(foreign_key="account.id", primary_key=True)
+    type: PaymentType = Field(
+        sa_column=Column(sqlmodel.Enum(PaymentType), primary_key=True)
+    )
+    amount: Decimal
+    count: int
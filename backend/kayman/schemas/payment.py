@@ -1,13 +1,24 @@
 import enum
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
 import sqlmodel
 from pydantic_extra_types.timezone_name import TimeZoneName
-from sqlmodel import Column, DateTime, Field, Relationship, SQLModel, UniqueConstraint
+from sqlalchemy import event
+from sqlmodel import (
+    Column,
+    Date,
+    DateTime,
+    Field,
+    Index,
+    Relationship,
+    SQLModel,
+    UniqueConstraint,
+)
 
 from kayman.schemas._custom_types import SATimezone
+from kayman.schemas._local_date import set_local_date
 
 if TYPE_CHECKING:
     from kayman.schemas.category import Category
@@ -37,7 +48,7 @@ class PaymentBase(SQLModel):
     )
     timestamp: datetime = Field(
         sa_column=Column(DateTime(timezone=True), nullable=False),
-        title="Local timestamp, or timezone-aware timestamp",
+        title="Timezone-aware timestamp, naive timestamps are taken as UTC",
     )
     timezone: TimeZoneName = Field(sa_column=Column(SATimezone(), nullable=False))
     description: str | None = None
@@ -45,13 +56,29 @@ class PaymentBase(SQLModel):
 
 class Payment(PaymentBase, table=True):
     __tablename__ = "payment"
+    __table_args__ = (
+        Index("ix_payment_timestamp_id", "timestamp", "id"),
+        Index("ix_payment_local_date", "local_date"),
+        Index("ix_payment_local_month", "local_month"),
+    )
     id: int | None = Field(primary_key=True, default=None)
+    # Derived from timestamp and timezone on every insert and update
+    local_date: date | None = Field(
+        default=None, sa_column=Column(Date, nullable=False)
+    )
+    local_month: date | None = Field(
+        default=None, sa_column=Column(Date, nullable=False)
+    )
     # Auto calculated for Expense or Income
     # Manually logged for Transfer or Exchange
     transactions: list["Transaction"] = Relationship(back_populates="payment")
     entries: list["PaymentEntry"] = Relationship(back_populates="payment")
 
 
+event.listen(Payment, "before_insert", set_local_date)
+event.listen(Payment, "before_update", set_local_date)
+
+
 class PaymentCreate(PaymentBase):
     pass
 
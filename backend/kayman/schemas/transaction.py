@@ -1,11 +1,23 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
 
 from pydantic_extra_types.timezone_name import TimeZoneName
-from sqlmodel import Column, DateTime, Field, Relationship, SQLModel, UniqueConstraint
+from sqlalchemy import event, text
+from sqlmodel import (
+    Column,
+    Date,
+    DateTime,
+    Field,
+    Index,
+    Numeric,
+    Relationship,
+    SQLModel,
+    UniqueConstraint,
+)
 
 from kayman.schemas._custom_types import SATimezone
+from kayman.schemas._local_date import set_local_date
 
 if TYPE_CHECKING:
     from kayman.schemas.account import Account
@@ -32,17 +44,59 @@ class Transaction(TransactionBase, table=True):
         UniqueConstraint(
             "payment_id", "index", name="transaction_payment_id_index_key"
         ),
+        Index("ix_transaction_local_date", "local_date"),
+        Index("ix_transaction_local_month", "local_month"),
+        # Covers balance-as-of lookups without visiting the table on PostgreSQL
+        Index(
+            "ix_transaction_account_timestamp",
+            "account_id",
+            "timestamp",
+            "id",
+            postgresql_include=["running_balance"],
+        ),
+        Index("ix_transaction_timestamp_id", "timestamp", "id"),
+        # Reconciliation queues, only a small share of the transactions
+        Index(
+            "ix_transaction_unreconciled",
+            "account_id",
+            "timestamp",
+            "id",
+            postgresql_where=text("reconcile = false"),
+        ),
+        Index(
+            "ix_transaction_psp_unreconciled",
+            "psp_id",
+            "timestamp",
+            "id",
+            postgresql_where=text("psp_id IS NOT NULL AND psp_reconcile = false"),
+        ),
     )
     id: int | None = Field(primary_key=True, default=None)
     timestamp: datetime = Field(
         sa_column=Column(DateTime(timezone=True), nullable=False)
     )
     timezone: TimeZoneName = Field(sa_column=Column(SATimezone(), nullable=False))
+    # Derived from timestamp and timezone on every insert and update
+    local_date: date | None = Field(
+        default=None, sa_column=Column(Date, nullable=False)
+    )
+    local_month: date | None = Field(
+        default=None, sa_column=Column(Date, nullable=False)
+    )
+    # Sum of the account's transactions up to this one, ordered by timestamp and id.
+    # Maintained by `update_running_balances` after inserts and deletes
+    running_balance: Decimal = Field(
+        default=Decimal(0), sa_column=Column(Numeric, nullable=False)
+    )
     account: "Account" = Relationship(back_populates="transactions")
     payment: "Payment" = Relationship(back_populates="transactions")
     psp: Optional["PSP"] = Relationship(back_populates="transactions")
 
 
+event.listen(Transaction, "before_insert", set_local_date)
+event.listen(Transaction, "before_update", set_local_date)
+
+
 class TransactionCreate(SQLModel):
     account_id: int
     amount: Decimal
@@ -59,3 +113,4 @@ class TransactionRead(TransactionBase):
     payment_id: int
     timestamp: datetime
     timezone: TimeZoneName
+    running_balance: Decimal
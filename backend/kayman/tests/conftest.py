@@ -1,14 +1,21 @@
 import os
 from collections.abc import Generator
+from typing import Any
 from uuid import uuid4
 
 import pytest
 from factory.alchemy import SQLAlchemyModelFactory
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
 
+from kayman.auth import get_client
+from kayman.core import db
 from kayman.main import app
+from kayman.schemas import Client
 
 
 @pytest.fixture(scope="function")
@@ -61,6 +68,48 @@ def session_2(db_uri) -> Generator[Session, None, None]:
     session.close()
 
 
+class QueryCounter:
+    """Count the statements sent to the database"""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *args: Any) -> None:
+        self.count += 1
+
+
+@pytest.fixture(scope="function")
+def query_counter(session: Session) -> Generator[QueryCounter, None, None]:
+    counter = QueryCounter()
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", counter)
+
+    yield counter
+
+    event.remove(engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture(scope="function")
+def api_client(
+    session: Session,  # noqa: ARG001  # Creates the tables, used by the factories
+    db_uri: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[TestClient, None, None]:
+    """Client of the app on the test database, for both async and sync sessions"""
+    async_uri = db_uri.replace("sqlite://", "sqlite+aiosqlite://")
+    monkeypatch.setattr(db, "engine", create_engine(db_uri, poolclass=NullPool))
+    monkeypatch.setattr(
+        db, "async_engine", create_async_engine(async_uri, poolclass=NullPool)
+    )
+    monkeypatch.setattr(db, "replica_engine", None)
+    monkeypatch.setattr(db, "async_replica_engine", None)
+    app.dependency_overrides[get_client] = lambda: Client(name="test", password="")
+
+    yield TestClient(app)
+
+    app.dependency_overrides.pop(get_client)
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -0,0 +1,181 @@
+import os
+from collections.abc import Generator
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from kayman.auth import get_client
+from kayman.core import db
+from kayman.main import app
+from kayman.schemas import Account, Client, Currency
+
+
+def _create_database(
+    monkeypatch: pytest.MonkeyPatch, uri: str, currency_code: str, replica: bool
+) -> None:
+    engine = create_engine(f"sqlite:///{uri}", poolclass=NullPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Currency(code=currency_code, name=currency_code, symbol="$"))
+        session.commit()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{uri}", poolclass=NullPool)
+    monkeypatch.setattr(db, "replica_engine" if replica else "engine", engine)
+    monkeypatch.setattr(
+        db, "async_replica_engine" if replica else "async_engine", async_engine
+    )
+
+
+@pytest.fixture(scope="function")
+def replica_client(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[TestClient, None, None]:
+    primary = f"/tmp/kayman-test-{uuid4()}.db"
+    replica = f"/tmp/kayman-test-{uuid4()}.db"
+    _create_database(monkeypatch, primary, "TWD", replica=False)
+    _create_database(monkeypatch, replica, "USD", replica=True)
+    app.dependency_overrides[get_client] = lambda: Client(name="test", password="")
+
+    yield TestClient(app)
+
+    app.dependency_overrides.pop(get_client)
+    os.remove(primary)
+    os.remove(replica)
+
+
+def _read_currency_codes(client: TestClient) -> list[str]:
+    response = client.get("/currencies")
+    assert response.status_code == 200
+    return sorted(currency["code"] for currency in response.json())
+
+
+def test_get_session_reads_replica(replica_client: TestClient):
+    assert _read_currency_codes(replica_client) == ["USD"]
+
+
+def test_get_session_reads_own_writes(replica_client: TestClient):
+    response = replica_client.post(
+        "/currencies", json={"code": "EUR", "name": "Euro", "symbol": "€"}
+    )
+    assert response.status_code == 200
+    assert db.READ_PRIMARY_COOKIE in response.cookies
+
+    # Written to the primary, and read from it while the cookie lasts
+    assert _read_currency_codes(replica_client) == ["EUR", "TWD"]
+
+    replica_client.cookies.clear()
+    assert _read_currency_codes(replica_client) == ["USD"]
+
+
+def test_get_session_reads_own_writes_cross_origin(replica_client: TestClient):
+    origin = "http://frontend.example"
+    replica_client.headers["Origin"] = origin
+
+    # The frontend sends requests with credentials, so the origin is echoed
+    response = replica_client.options(
+        "/currencies",
+        headers={"Access-Control-Request-Method": "POST"},
+    )
+    assert response.headers["access-control-allow-origin"] == origin
+    assert response.headers["access-control-allow-credentials"] == "true"
+    response = replica_client.post(
+        "/currencies", json={"code": "EUR", "name": "Euro", "symbol": "€"}
+    )
+    assert response.headers["access-control-allow-origin"] == origin
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert "samesite=lax" in response.headers["set-cookie"].lower()
+    assert _read_currency_codes(replica_client) == ["EUR", "TWD"]
+
+
+def test_get_session_cookie_cross_site(replica_client: TestClient):
+    # Over HTTPS the cookie is sent along with cross-site requests as well
+    replica_client.base_url = replica_client.base_url.copy_with(scheme="https")
+    response = replica_client.post(
+        "/currencies", json={"code": "EUR", "name": "Euro", "symbol": "€"}
+    )
+    cookie = response.headers["set-cookie"].lower()
+    assert "samesite=none" in cookie
+    assert "secure" in cookie
+
+
+def test_get_session_without_replica(
+    replica_client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(db, "async_replica_engine", None)
+
+    assert _read_currency_codes(replica_client) == ["TWD"]
+
+
+def test_get_sync_session_reads_replica(replica_client: TestClient):
+    with Session(db.engine) as session:
+        session.add(Account(name="Cash", currency_code="TWD", balance=0))
+        session.commit()
+
+    # Verified in the threadpool on the replica, which has no accounts
+    response = replica_client.get("/accounts/ledger")
+    assert response.status_code == 200
+    assert response.json()["checked"] == 0
+
+    replica_client.cookies.set(db.READ_PRIMARY_COOKIE, "1")
+    assert replica_client.get("/accounts/ledger").json()["checked"] == 1
+
+
+def test_alembic_upgrade_at_head(db_uri: str, monkeypatch: pytest.MonkeyPatch):
+    engine = create_engine(db_uri)
+    script = ScriptDirectory.from_config(Config("alembic.ini"))
+    with engine.begin() as connection:
+        MigrationContext.configure(connection).stamp(script, "head")
+
+    def upgrade(*_: Any) -> None:
+        raise AssertionError("Database at head should not be upgraded")
+
+    monkeypatch.setattr("alembic.command.upgrade", upgrade)
+    db.alembic_upgrade(engine)
+
+
+def test_alembic_upgrade_behind(db_uri: str, monkeypatch: pytest.MonkeyPatch):
+    engine = create_engine(db_uri)
+    calls: list[tuple[Config, str]] = []
+    monkeypatch.setattr("alembic.command.upgrade", lambda *args: calls.append(args))
+    db.alembic_upgrade(engine)
+
+    assert len(calls) == 1
+    alembic_cfg, revision = calls[0]
+    assert revision == "head"
+    assert "connection" in alembic_cfg.attributes
+
+
+def test_alembic_upgrade_failed(db_uri: str, monkeypatch: pytest.MonkeyPatch):
+    engine = create_engine(db_uri)
+    # Take the Postgres path, with the advisory lock functions stubbed in SQLite
+    monkeypatch.setattr(engine.dialect, "name", "postgresql")
+    calls: list[str] = []
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection: Any, _: Any) -> None:
+        for name in ("pg_advisory_lock", "pg_advisory_unlock"):
+            dbapi_connection.create_function(
+                name, 1, lambda _, name=name: calls.append(name)
+            )
+
+    @event.listens_for(engine, "rollback")
+    def rollback(_: Any) -> None:
+        calls.append("rollback")
+
+    def upgrade(*_: Any) -> None:
+        raise RuntimeError("Upgrade failed")
+
+    monkeypatch.setattr("alembic.command.upgrade", upgrade)
+    with pytest.raises(RuntimeError, match="Upgrade failed"):
+        db.alembic_upgrade(engine)
+
+    # The failed upgrade is rolled back before unlocking
+    assert calls[:3] == ["pg_advisory_lock", "rollback", "pg_advisory_unlock"]
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import exc
+from sqlmodel import create_engine
+
+from kayman.core.pool import StatsQueuePool, attach_pool_stats
+
+
+def test_pool_stats(db_uri: str):
+    engine = create_engine(
+        db_uri, poolclass=StatsQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1
+    )
+    stats = attach_pool_stats(engine)
+
+    with engine.connect():
+        status = stats.status(engine.pool)
+        assert status.checked_out == 1
+        assert status.idle == 0
+        assert status.waits == 0
+
+        # The only connection is in use
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    status = stats.status(engine.pool)
+    assert status.checked_out == 0
+    assert status.idle == 1
+    assert status.connects == 1
+    assert status.checkouts == 1
+    assert status.checkins == 1
+    assert status.waits == 1
+    assert status.timeouts == 1
+    assert status.wait_seconds >= 0.1
+    assert sum(bucket.count for bucket in status.wait_histogram) == 2
+
+
+def test_pool_stats_default_pool():
+    with pytest.raises(ValueError):
+        attach_pool_stats(create_engine("sqlite://"))
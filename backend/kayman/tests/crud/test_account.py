@@ -14,8 +14,12 @@ from kayman.crud.account import (
     update_account_balances,
     update_accounts,
 )
+from kayman.crud.account_balance import (
+    rebuild_account_balances,
+    verify_account_balances,
+)
 from kayman.schemas.account import Account
-from kayman.tests.factories import AccountFactory
+from kayman.tests.factories import AccountFactory, TransactionFactory
 
 
 def test_create_account(session: Session):
@@ -170,3 +174,84 @@ def test__verify_account_ids(session: Session):
 def test__verify_account_ids_not_found(session: Session):
     with pytest.raises(ValueError, match=re.escape("Account id(s) not found: {1}")):
         _verify_account_ids(session, [1])
+
+
+def test_update_account_balances_query_count(session: Session, query_counter):
+    accounts = AccountFactory.create_batch(10)
+    account_amounts = {account.id: Decimal(1) for account in accounts}
+
+    query_counter.count = 0
+    update_account_balances(session, account_amounts, commit=False)
+    assert query_counter.count == 1  # UPDATE ... RETURNING
+
+
+def test_update_account_balances_not_found(session: Session, session_2: Session):
+    account = AccountFactory()
+    account_balance = account.balance
+    account_amounts = {account.id: Decimal(1), account.id + 1: Decimal(1)}
+
+    with pytest.raises(
+        ValueError, match=re.escape(f"Account id(s) not found: {{{account.id + 1}}}")
+    ):
+        update_account_balances(session, account_amounts)
+
+    # No balance should be updated
+    session.commit()
+    assert session_2.get(Account, account.id).balance == account_balance
+
+
+def test_verify_account_balances(session: Session):
+    # Keep amounts small, as SQLite stores decimals as floats
+    accounts = [
+        AccountFactory(balance=balance)
+        for balance in (Decimal(1) / 2, Decimal(1), Decimal(0))
+    ]
+    for account in (accounts[0], accounts[0], accounts[1]):
+        TransactionFactory(account=account, amount=Decimal(1) / 4)
+
+    report = verify_account_balances(session)
+    assert report.checked == 3
+    assert [(drift.account_id, drift.drift) for drift in report.drifts] == [
+        (accounts[1].id, Decimal(3) / 4)
+    ]
+    assert report.drifts[0].ledger_balance == Decimal(1) / 4
+
+    # Only balance changes make accounts pending, and drifted accounts stay pending
+    # once a run is recorded
+    for account in accounts:
+        update_account_balances(session, {account.id: Decimal(0)})
+    assert verify_account_balances(session, pending=True).checked == 3
+    verify_account_balances(session, pending=True, commit=True)
+    report = verify_account_balances(session, pending=True)
+    assert report.checked == 1
+    assert report.drifts[0].account_id == accounts[1].id
+
+    # Accounts are pending again once their balance changes, in whichever order
+    # those changes commit, while a transaction written without its balance update
+    # is left to full runs
+    transaction = TransactionFactory(account=accounts[0], amount=Decimal(1) / 4)
+    update_account_balances(session, {accounts[0].id: Decimal(1) / 4})
+    TransactionFactory(account=accounts[2], amount=Decimal(1) / 4)
+    report = verify_account_balances(session, pending=True, commit=True)
+    assert report.checked == 2
+    assert [drift.account_id for drift in report.drifts] == [accounts[1].id]
+    assert verify_account_balances(session, pending=True).checked == 1
+    assert [drift.account_id for drift in verify_account_balances(session).drifts] == [
+        accounts[1].id,
+        accounts[2].id,
+    ]
+
+    # Deletions are caught through the balance update along
+    session.delete(transaction)
+    update_account_balances(session, {accounts[0].id: Decimal(0)})
+    report = verify_account_balances(session, pending=True)
+    assert report.checked == 2
+    assert [(drift.account_id, drift.drift) for drift in report.drifts] == [
+        (accounts[0].id, Decimal(1) / 4),
+        (accounts[1].id, Decimal(3) / 4),
+    ]
+
+    rebuild_account_balances(session)
+    assert verify_account_balances(session).drifts == []
+    assert read_account(session, accounts[1].id).balance == Decimal(1) / 4
+    assert read_account(session, accounts[2].id).balance == Decimal(1) / 4
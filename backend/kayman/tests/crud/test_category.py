@@ -0,0 +1,213 @@
+from collections.abc import Generator
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, select
+
+from kayman.crud.category import (
+    CategoryTree,
+    category_tree,
+    create_category,
+    read_category_rollup,
+    read_category_subtree,
+    read_category_tree,
+    update_category,
+)
+from kayman.schemas.category import Category, CategoryClosure, CategoryCreate
+from kayman.tests.conftest import QueryCounter
+from kayman.tests.factories import (
+    CategoryFactory,
+    CurrencyFactory,
+    PaymentEntryFactory,
+    PaymentFactory,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_category_tree() -> Generator[None, None, None]:
+    category_tree.invalidate()
+    yield
+    category_tree.invalidate()
+
+
+def test_read_category_tree(session: Session, query_counter: QueryCounter):
+    root = CategoryFactory.create()
+    child = CategoryFactory.create(parent_id=root.id)
+    grandchild = CategoryFactory.create(parent_id=child.id)
+    other_root = CategoryFactory.create()
+    query_counter.count = 0
+
+    roots = read_category_tree(session)
+
+    assert [node.id for node in roots] == [root.id, other_root.id]
+    assert roots[0].sub_categories is not None
+    assert [node.id for node in roots[0].sub_categories] == [child.id]
+    assert roots[0].sub_categories[0].sub_categories is not None
+    assert [node.id for node in roots[0].sub_categories[0].sub_categories] == [
+        grandchild.id
+    ]
+    assert query_counter.count == 1
+
+    # The tree is cached until categories change
+    assert read_category_tree(session) is roots
+    assert query_counter.count == 1
+
+    subtree = read_category_subtree(session, child.id)
+    assert subtree is not None
+    assert subtree.sub_categories is not None
+    assert [node.id for node in subtree.sub_categories] == [grandchild.id]
+    assert read_category_subtree(session, 0) is None
+    assert query_counter.count == 1
+
+
+def test_read_category_tree_invalidated(session: Session):
+    root = CategoryFactory.create()
+    assert [node.id for node in read_category_tree(session)] == [root.id]
+
+    child = create_category(session, CategoryCreate(name="Child", parent_id=root.id))
+    roots = read_category_tree(session)
+    assert roots[0].sub_categories is not None
+    assert [node.id for node in roots[0].sub_categories] == [child.id]
+
+    update_category(session, Category(id=child.id, name=child.name))
+    assert [node.id for node in read_category_tree(session)] == [root.id, child.id]
+
+
+def test_read_category_tree_expired(session: Session):
+    root = CategoryFactory.create()
+    cached = CategoryTree(ttl=60)
+    expired = CategoryTree(ttl=0)
+    assert [node.id for node in cached.roots(session)] == [root.id]
+    assert [node.id for node in expired.roots(session)] == [root.id]
+
+    # Categories written by another process, without invalidating these trees
+    other_root = CategoryFactory.create()
+    assert [node.id for node in cached.roots(session)] == [root.id]
+    assert [node.id for node in expired.roots(session)] == [root.id, other_root.id]
+
+
+def test_category_closure(session: Session):
+    root = CategoryFactory.create()
+    child = CategoryFactory.create(parent_id=root.id)
+    other_root = CategoryFactory.create()
+    grandchild = create_category(
+        session, CategoryCreate(name="Grandchild", parent_id=child.id)
+    )
+
+    def closure() -> set[tuple[int, int, int]]:
+        rows = session.exec(select(CategoryClosure)).all()
+        return {(row.ancestor_id, row.descendant_id, row.depth) for row in rows}
+
+    assert closure() == {
+        (root.id, root.id, 0),
+        (child.id, child.id, 0),
+        (grandchild.id, grandchild.id, 0),
+        (other_root.id, other_root.id, 0),
+        (root.id, child.id, 1),
+        (root.id, grandchild.id, 2),
+        (child.id, grandchild.id, 1),
+    }
+
+    # Move the child with its subtree under the other root
+    update_category(
+        session, Category(id=child.id, name=child.name, parent_id=other_root.id)
+    )
+    assert closure() == {
+        (root.id, root.id, 0),
+        (child.id, child.id, 0),
+        (grandchild.id, grandchild.id, 0),
+        (other_root.id, other_root.id, 0),
+        (other_root.id, child.id, 1),
+        (other_root.id, grandchild.id, 2),
+        (child.id, grandchild.id, 1),
+    }
+
+    # Make the child a root
+    update_category(session, Category(id=child.id, name=child.name))
+    assert (other_root.id, grandchild.id, 2) not in closure()
+    assert (child.id, grandchild.id, 1) in closure()
+
+
+def test_update_category_cycle(session: Session):
+    root = CategoryFactory.create()
+    child = CategoryFactory.create(parent_id=root.id)
+
+    with pytest.raises(ValueError):
+        update_category(
+            session, Category(id=root.id, name=root.name, parent_id=root.id)
+        )
+    with pytest.raises(ValueError):
+        update_category(
+            session, Category(id=root.id, name=root.name, parent_id=child.id)
+        )
+
+    # Descendants missing from the cached tree are found as well
+    read_category_tree(session)
+    grandchild = CategoryFactory.create(parent_id=child.id)
+    with pytest.raises(ValueError):
+        update_category(
+            session, Category(id=root.id, name=root.name, parent_id=grandchild.id)
+        )
+
+
+def test_read_category_rollup(session: Session, query_counter: QueryCounter):
+    food = CategoryFactory.create()
+    restaurant = CategoryFactory.create(parent_id=food.id)
+    salary = CategoryFactory.create()
+    usd = CurrencyFactory.create(code="USD")
+    twd = CurrencyFactory.create(code="TWD")
+    january = datetime(2024, 1, 10, tzinfo=UTC)
+    february = datetime(2024, 2, 10, tzinfo=UTC)
+    payment = PaymentFactory.create(timestamp=january)
+    PaymentEntryFactory.create(
+        payment=payment, category=food, currency=usd, amount=Decimal(3), quantity=2
+    )
+    PaymentEntryFactory.create(
+        payment=payment,
+        category=restaurant,
+        currency=usd,
+        amount=Decimal(10),
+        quantity=1,
+    )
+    PaymentEntryFactory.create(
+        payment=PaymentFactory.create(timestamp=january),
+        category=restaurant,
+        currency=twd,
+        amount=Decimal(100),
+        quantity=1,
+    )
+    PaymentEntryFactory.create(
+        payment=PaymentFactory.create(timestamp=february),
+        category=salary,
+        currency=usd,
+        amount=Decimal(50),
+        quantity=1,
+    )
+    query_counter.count = 0
+
+    rollup = read_category_rollup(
+        session, start=january, end=datetime(2024, 2, 1, tzinfo=UTC)
+    )
+    assert query_counter.count == 1
+    assert {
+        (row.category_id, row.currency_code): (
+            row.count,
+            row.amount,
+            row.total_count,
+            row.total_amount,
+        )
+        for row in rollup
+    } == {
+        (food.id, "TWD"): (0, 0, 1, 100),
+        (food.id, "USD"): (1, 6, 2, 16),
+        (restaurant.id, "TWD"): (1, 100, 1, 100),
+        (restaurant.id, "USD"): (1, 10, 1, 10),
+    }
+
+    rollup = read_category_rollup(session, currency_code="USD")
+    assert {(row.category_id, row.total_amount) for row in rollup} == {
+        (food.id, 16),
+        (restaurant.id, 10),
+        (salary.id, 50),
+    }
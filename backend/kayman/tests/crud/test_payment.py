@@ -1,12 +1,14 @@
-from datetime import datetime
+from datetime import UTC, date, datetime
 
 from sqlmodel import Session
 
 from kayman.crud.payment import create_payment, read_payment, read_payments
+from kayman.schemas.api_models import PaymentReadDetailed
 from kayman.tests.factories import (
     CategoryFactory,
     PaymentEntryFactory,
     PaymentFactory,
+    TransactionFactory,
 )
 
 
@@ -66,8 +68,38 @@ def test_read_payments_by_date(session: Session):
     PaymentFactory(timestamp=datetime(2025, 1, 1))
     PaymentFactory(timestamp=datetime(2025, 1, 2))
 
-    assert len(read_payments(session, payment_date="2025-01-01")) == 1
-    assert len(read_payments(session, payment_date="2025-01-02")) == 1
+    assert len(read_payments(session, payment_date=date(2025, 1, 1))) == 1
+    assert len(read_payments(session, payment_date=date(2025, 1, 2))) == 1
+
+
+def test_read_payments_by_local_date(session: Session):
+    # 2025-01-01 20:00 UTC is already 2025-01-02 in Taipei
+    payment = PaymentFactory(
+        timestamp=datetime(2025, 1, 1, 20, tzinfo=UTC), timezone="Asia/Taipei"
+    )
+    assert payment.local_date == date(2025, 1, 2)
+    assert payment.local_month == date(2025, 1, 1)
+
+    assert len(read_payments(session, payment_date=date(2025, 1, 1))) == 0
+    assert len(read_payments(session, payment_date=date(2025, 1, 2))) == 1
+
+    # Naive timestamps are taken as UTC, 2025-01-31 23:30 UTC is 02-01 in Taipei
+    naive = PaymentFactory(
+        timestamp=datetime(2025, 1, 31, 23, 30), timezone="Asia/Taipei"
+    )
+    assert naive.local_date == date(2025, 2, 1)
+    assert naive.local_month == date(2025, 2, 1)
+    naive = PaymentFactory(
+        timestamp=datetime(2025, 2, 1, 0, 30), timezone="America/New_York"
+    )
+    assert naive.local_date == date(2025, 1, 31)
+    assert naive.local_month == date(2025, 1, 1)
+
+    # Local date follows timestamp updates
+    payment.timestamp = datetime(2025, 2, 1, 12)
+    session.commit()
+    assert payment.local_date == date(2025, 2, 1)
+    assert payment.local_month == date(2025, 2, 1)
 
 
 def test_read_payments_by_category(session: Session):
@@ -100,3 +132,102 @@ def test_read_payments_by_category(session: Session):
     payments = read_payments(session, category_id=category_3.id)
     assert len(payments) == 1
     assert payments[0].id == payment_2.id
+
+
+def test_read_payments_by_category_subtree(session: Session):
+    food = CategoryFactory()
+    restaurant = CategoryFactory(parent_id=food.id)
+    coffee = CategoryFactory(parent_id=restaurant.id)
+    other = CategoryFactory()
+    payment_1 = PaymentFactory(entries=[PaymentEntryFactory(category=coffee)])
+    payment_2 = PaymentFactory(
+        entries=[
+            PaymentEntryFactory(category=restaurant),
+            PaymentEntryFactory(category=coffee),
+        ]
+    )
+    PaymentFactory(entries=[PaymentEntryFactory(category=other)])
+
+    payments = read_payments(session, category_id=food.id)
+    assert {payment.id for payment in payments} == {payment_1.id, payment_2.id}
+
+    payments = read_payments(session, category_id=coffee.id)
+    assert {payment.id for payment in payments} == {payment_1.id, payment_2.id}
+
+    # Moving a category moves its subcategories along
+    coffee.parent_id = other.id
+    session.commit()
+    payments = read_payments(session, category_id=food.id)
+    assert [payment.id for payment in payments] == [payment_2.id]
+    payments = read_payments(session, category_id=other.id)
+    assert len(payments) == 3
+
+
+def test_read_payment_query_count(session: Session, query_counter):
+    payment = PaymentFactory()
+    PaymentEntryFactory.create_batch(3, payment=payment)
+    TransactionFactory.create_batch(3, payment=payment)
+    payment_id = payment.id
+    session.expire_all()
+
+    query_counter.count = 0
+    db_payment = read_payment(session, payment_id)
+    detailed = PaymentReadDetailed.model_validate(db_payment)
+
+    assert len(detailed.entries) == 3
+    assert len(detailed.transactions) == 3
+    assert query_counter.count == 3  # payment, transactions, entries
+
+
+def test_read_payments_query_count(session: Session, query_counter):
+    for _ in range(10):
+        payment = PaymentFactory()
+        PaymentEntryFactory.create_batch(2, payment=payment)
+        TransactionFactory.create_batch(2, payment=payment)
+    session.expire_all()
+
+    query_counter.count = 0
+    payments = read_payments(session)
+    detailed = [PaymentReadDetailed.model_validate(payment) for payment in payments]
+
+    assert len(detailed) == 10
+    for payment in detailed:
+        assert len(payment.entries) == 2
+        assert len(payment.transactions) == 2
+    assert query_counter.count == 3  # payments, transactions, entries
+
+
+def test_read_payments_by_range(session: Session):
+    PaymentFactory(timestamp=datetime(2025, 1, 1, 12))
+    PaymentFactory(timestamp=datetime(2025, 1, 2, 12))
+    PaymentFactory(timestamp=datetime(2025, 1, 3, 12))
+
+    payments = read_payments(
+        session, start=datetime(2025, 1, 2), end=datetime(2025, 1, 3, 12)
+    )
+    assert len(payments) == 1
+    assert payments[0].timestamp == datetime(2025, 1, 2, 12)
+
+
+def test_read_payments_keyset(session: Session):
+    timestamp = datetime(2025, 1, 1)
+    for day in (3, 1, 2, 2, 4):
+        PaymentFactory(timestamp=timestamp.replace(day=day))
+    expected = [
+        (payment.timestamp, payment.id)
+        for payment in sorted(
+            read_payments(session), key=lambda payment: (payment.timestamp, payment.id)
+        )
+    ]
+
+    keys = []
+    after = None
+    while True:
+        page = read_payments(session, after=after, limit=2)
+        if not page:
+            break
+        assert len(page) <= 2
+        keys.extend((payment.timestamp, payment.id) for payment in page)
+        after = keys[-1]
+
+    assert keys == expected
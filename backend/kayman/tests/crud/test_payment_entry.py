@@ -76,3 +76,24 @@ def test_create_payment_entries_no_commit(session: Session, session_2: Session):
     assert session_2_entry.index == session_entry.index
     assert session_2_entry.payment_id == session_entry.payment_id
     assert session_2_entry.quantity == session_entry.quantity
+
+
+def test_create_payment_entries_query_count(session: Session, query_counter):
+    counts = []
+    for payment_id, entry_num in enumerate([1, 10], start=1):
+        entries = [
+            PaymentEntryBase.model_validate(
+                entry, update={"payment_id": payment_id, "index": entry_index}
+            )
+            for entry_index, entry in enumerate(
+                PaymentFactory.build_details(entry_num=entry_num).entries
+            )
+        ]
+        query_counter.count = 0
+        db_entries = create_payment_entries(session, entries)
+        counts.append(query_counter.count)
+
+        assert [db_entry.index for db_entry in db_entries] == list(range(entry_num))
+        assert all(db_entry.id is not None for db_entry in db_entries)
+
+    assert counts == [1, 1]  # One INSERT ... RETURNING, no refresh
@@ -1,6 +1,19 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
 from sqlmodel import Session
 
-from kayman.crud.transaction import create_transactions, get_transactions
+from kayman.crud.account_balance import read_balance_at
+from kayman.crud.transaction import (
+    count_unreconciled_transactions,
+    create_transactions,
+    get_transactions,
+    get_unreconciled_transactions,
+    rebuild_running_balances,
+    update_running_balances,
+)
+from kayman.schemas.psp import PSP
 from kayman.schemas.transaction import Transaction, TransactionBase
 from kayman.tests.factories import AccountFactory, PaymentFactory, TransactionFactory
 
@@ -120,3 +133,165 @@ def test_get_transactions_by_account(session: Session):
 
     assert len(get_transactions(session, account_id=account_1.id)) == 1
     assert len(get_transactions(session, account_id=account_2.id)) == 1
+
+
+def test_get_transactions_keyset(session: Session):
+    account = AccountFactory()
+    for day in (3, 1, 2, 2, 4):
+        TransactionFactory(account=account, timestamp=datetime(2025, 1, day))
+    TransactionFactory(timestamp=datetime(2025, 1, 2))  # Another account
+    expected = [
+        (txn.timestamp, txn.id)
+        for txn in sorted(
+            get_transactions(session, account_id=account.id),
+            key=lambda txn: (txn.timestamp, txn.id),
+        )
+    ]
+
+    keys = []
+    after = None
+    while True:
+        page = get_transactions(session, account_id=account.id, after=after, limit=2)
+        if not page:
+            break
+        assert len(page) <= 2
+        keys.extend((txn.timestamp, txn.id) for txn in page)
+        after = keys[-1]
+
+    assert keys == expected
+    txns = get_transactions(
+        session, start=datetime(2025, 1, 2), end=datetime(2025, 1, 4)
+    )
+    assert [txn.timestamp.day for txn in txns] == [2, 2, 2, 3]
+
+
+def test_get_unreconciled_transactions(session: Session):
+    account = AccountFactory()
+    psp = PSP(name="PSP")
+    session.add(psp)
+    session.commit()
+    for day, reconcile, psp_reconcile in [
+        (3, False, False),
+        (1, False, True),
+        (2, True, False),
+        (4, True, True),
+    ]:
+        TransactionFactory(
+            account=account,
+            timestamp=datetime(2025, 1, day),
+            reconcile=reconcile,
+            psp_id=psp.id,
+            psp_reconcile=psp_reconcile,
+        )
+    TransactionFactory(reconcile=False)  # Another account
+    TransactionFactory(account=account, reconcile=True, psp_reconcile=False)  # No PSP
+
+    txns = get_unreconciled_transactions(session, account_id=account.id)
+    assert [txn.timestamp.day for txn in txns] == [1, 3]
+    assert count_unreconciled_transactions(session, account_id=account.id) == 2
+    assert count_unreconciled_transactions(session) == 3
+
+    txns = get_unreconciled_transactions(session, "psp", psp_id=psp.id, limit=1)
+    assert [txn.timestamp.day for txn in txns] == [2]
+    after = (txns[0].timestamp, txns[0].id)
+    txns = get_unreconciled_transactions(session, "psp", psp_id=psp.id, after=after)
+    assert [txn.timestamp.day for txn in txns] == [3]
+    assert count_unreconciled_transactions(session, "psp") == 2
+
+
+def test_create_transactions_query_count(session: Session, query_counter):
+    counts = []
+    for payment_id, transaction_num in enumerate([1, 10], start=1):
+        txns = [
+            TransactionBase.model_validate(
+                txn, update={"payment_id": payment_id, "index": txn_index}
+            )
+            for txn_index, txn in enumerate(
+                PaymentFactory.build_details(
+                    transaction_num=transaction_num
+                ).transactions
+            )
+        ]
+        query_counter.count = 0
+        db_txns = create_transactions(session, txns)
+        counts.append(query_counter.count)
+
+        assert [db_txn.index for db_txn in db_txns] == list(range(transaction_num))
+        assert all(db_txn.id is not None for db_txn in db_txns)
+
+    assert counts == [1, 1]  # One INSERT ... RETURNING, no refresh
+
+
+def _running_balances(session: Session, account_id: int) -> list[Decimal]:
+    txns = get_transactions(session, account_id=account_id)
+    return [
+        txn.running_balance
+        for txn in sorted(txns, key=lambda txn: (txn.timestamp, txn.id))
+    ]
+
+
+def test_update_running_balances(session: Session):
+    account = AccountFactory()
+    other_account = AccountFactory()
+    # Keep amounts small, as SQLite stores decimals as floats
+    txns = [
+        TransactionFactory(
+            account=account, amount=Decimal(1) / 4, timestamp=datetime(2024, 1, day)
+        )
+        for day in (2, 3, 3, 5)
+    ]
+    other_txn = TransactionFactory(account=other_account, amount=Decimal(1))
+    update_running_balances(session, [*txns, other_txn])
+    session.commit()
+    assert _running_balances(session, account.id) == [
+        Decimal(1) / 4,
+        Decimal(1) / 2,
+        Decimal(3) / 4,
+        Decimal(1),
+    ]
+
+    # A backdated transaction shifts the running balances after it
+    backdated = TransactionFactory(
+        account=account, amount=Decimal(1) / 2, timestamp=datetime(2024, 1, 3)
+    )
+    update_running_balances(session, [backdated])
+    session.commit()
+    assert _running_balances(session, account.id) == [
+        Decimal(1) / 4,
+        Decimal(1) / 2,
+        Decimal(3) / 4,
+        Decimal(5) / 4,
+        Decimal(3) / 2,
+    ]
+
+    # Deleted transactions are taken out of the later running balances
+    session.delete(txns[0])
+    session.flush()
+    update_running_balances(session, [txns[0]])
+    session.commit()
+    assert _running_balances(session, account.id) == [
+        Decimal(1) / 4,
+        Decimal(1) / 2,
+        Decimal(1),
+        Decimal(5) / 4,
+    ]
+    assert _running_balances(session, other_account.id) == [Decimal(1)]
+
+    # Recomputing all of them gives the same running balances
+    running_balances = _running_balances(session, account.id)
+    rebuild_running_balances(session)
+    assert _running_balances(session, account.id) == running_balances
+
+    balance = read_balance_at(session, account.id, datetime(2024, 1, 4))
+    assert balance.balance == Decimal(1)
+    assert balance.transaction_id == backdated.id
+    balance = read_balance_at(session, account.id, datetime(2024, 1, 1))
+    assert (balance.balance, balance.transaction_id) == (Decimal(0), None)
+    balance = read_balance_at(session, account.id)
+    assert balance.balance == Decimal(5) / 4
+    assert balance.timestamp.tzinfo is not None
+
+
+def test_read_balance_at_not_found(session: Session):
+    with pytest.raises(ValueError, match="Account not found"):
+        read_balance_at(session, 1)
@@ -2,6 +2,7 @@ import factory
 from factory.alchemy import SQLAlchemyModelFactory
 
 from kayman.schemas import Account
+from kayman.tests.factories.amount import quarter_amount
 
 
 class AccountFactory(SQLAlchemyModelFactory):
@@ -13,4 +14,4 @@ class AccountFactory(SQLAlchemyModelFactory):
     name = factory.Faker("name")
     currency = factory.SubFactory("kayman.tests.factories.currency.CurrencyFactory")
     currency_code = factory.SelfAttribute("currency.code")
-    balance = factory.Faker("pydecimal", left_digits=5, right_digits=2)
+    balance = quarter_amount()
@@ -0,0 +1,14 @@
+from decimal import Decimal
+
+import factory
+from factory.random import randgen
+
+
+def quarter_amount() -> factory.LazyFunction:
+    """
+    Amounts in quarters up to 99999.75 either way
+
+    SQLite stores decimals as floats, so amounts are kept exact in binary to read
+    back equal to what was written.
+    """
+    return factory.LazyFunction(lambda: Decimal(randgen.randint(-399999, 399999)) / 4)
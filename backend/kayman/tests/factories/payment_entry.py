@@ -2,6 +2,7 @@ import factory
 from factory.alchemy import SQLAlchemyModelFactory
 
 from kayman.schemas import PaymentEntry
+from kayman.tests.factories.amount import quarter_amount
 
 
 class PaymentEntryFactory(SQLAlchemyModelFactory):
@@ -9,7 +10,7 @@ class PaymentEntryFactory(SQLAlchemyModelFactory):
         model = PaymentEntry
         sqlalchemy_session_persistence = "commit"
 
-    amount = factory.Faker("pydecimal", left_digits=5, right_digits=2)
+    amount = quarter_amount()
     category = factory.SubFactory("kayman.tests.factories.category.CategoryFactory")
     category_id = factory.SelfAttribute("category.id")
     description = factory.Faker("sentence")
@@ -2,6 +2,7 @@ import factory
 from factory.alchemy import SQLAlchemyModelFactory
 
 from kayman.schemas import Transaction
+from kayman.tests.factories.amount import quarter_amount
 
 
 class TransactionFactory(SQLAlchemyModelFactory):
@@ -11,7 +12,7 @@ class TransactionFactory(SQLAlchemyModelFactory):
 
     account = factory.SubFactory("kayman.tests.factories.account.AccountFactory")
     account_id = factory.SelfAttribute("account.id")
-    amount = factory.Faker("pydecimal", left_digits=5, right_digits=2)
+    amount = quarter_amount()
     description = factory.Faker("sentence")
     index = factory.Sequence(lambda n: n)
     payment = factory.SubFactory("kayman.tests.factories.payment.PaymentFactory")
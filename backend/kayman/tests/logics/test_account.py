@@ -1,3 +1,4 @@
+from decimal import Decimal
 from random import shuffle
 
 from sqlmodel import Session
@@ -7,9 +8,17 @@ from kayman.logics.account import update_balances_with_transactions
 from kayman.tests.factories import AccountFactory, TransactionFactory
 
 
+def _amount(seed: int) -> Decimal:
+    """
+    Deterministic amount in quarters, which SQLite stores exactly although it keeps
+    decimals as floats, so balances added up in SQL compare equal
+    """
+    return Decimal(seed * 7919 % 800000 - 400000) / 4
+
+
 def test_update_balances_with_transactions_1_account_1_txn(session: Session):
-    account = AccountFactory()
-    transaction = TransactionFactory(account=account)
+    account = AccountFactory(balance=_amount(1))
+    transaction = TransactionFactory(account=account, amount=_amount(2))
     original_balance = account.balance
 
     update_balances_with_transactions(session, [transaction])
@@ -19,8 +28,11 @@ def test_update_balances_with_transactions_1_account_1_txn(session: Session):
 
 
 def test_update_balances_with_transactions_1_account_n_txn(session: Session):
-    account = AccountFactory()
-    transactions = TransactionFactory.create_batch(10, account=account)
+    account = AccountFactory(balance=_amount(1))
+    transactions = [
+        TransactionFactory(account=account, amount=_amount(seed))
+        for seed in range(2, 12)
+    ]
     original_balance = account.balance
     total_amount = sum(txn.amount for txn in transactions)
 
@@ -31,12 +43,15 @@ def test_update_balances_with_transactions_1_account_n_txn(session: Session):
 
 
 def test_update_balances_with_transactions_n_account_n_txn(session: Session):
-    accounts = AccountFactory.create_batch(10)
+    accounts = [AccountFactory(balance=_amount(seed)) for seed in range(10)]
     original_balances = {account.id: account.balance for account in accounts}
     transactions = []
     total_amounts = {}
-    for account in accounts:
-        account_transactions = TransactionFactory.create_batch(10, account=account)
+    for index, account in enumerate(accounts):
+        account_transactions = [
+            TransactionFactory(account=account, amount=_amount(100 * index + seed))
+            for seed in range(10)
+        ]
         transactions.extend(account_transactions)
         total_amounts[account.id] = sum(txn.amount for txn in account_transactions)
 
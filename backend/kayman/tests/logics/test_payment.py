@@ -1,8 +1,37 @@
+from datetime import date, datetime
+from decimal import Decimal
+
 import pytest
+from sqlmodel import Session
 
-from kayman.logics.payment import validate_total
-from kayman.schemas.payment import PaymentType
-from kayman.tests.factories import PaymentFactory
+from kayman.crud.account import read_account
+from kayman.crud.account_balance import (
+    HISTORY_POINTS_MAX,
+    read_balance_history,
+    rebuild_daily_changes,
+)
+from kayman.crud.monthly_flow import (
+    read_monthly_account_flows,
+    read_monthly_category_flows,
+    rebuild_monthly_flows,
+)
+from kayman.crud.payment import read_payment, read_payments
+from kayman.crud.transaction import get_transactions
+from kayman.logics.payment import (
+    create_payments_detailed,
+    delete_payment,
+    import_payments,
+    update_payment,
+    validate_batch,
+    validate_total,
+)
+from kayman.schemas.payment import PaymentRead, PaymentType
+from kayman.tests.factories import (
+    AccountFactory,
+    CategoryFactory,
+    CurrencyFactory,
+    PaymentFactory,
+)
 
 
 def test_validate_total_expense():
@@ -73,3 +102,317 @@ def test_validate_total_exchange():
         type=PaymentType.Exchange, entry_num=3, transaction_num=5
     )
     validate_total(details)
+
+
+def _build_stored_details(account, category, currency, **kwargs):
+    """Build payment details referencing stored account, category and currency"""
+    details = PaymentFactory.build_details(**kwargs)
+    for entry in details.entries:
+        entry.category_id = category.id
+        entry.currency_code = currency.code
+    for transaction in details.transactions:
+        transaction.account_id = account.id
+    return details
+
+
+def test_validate_batch(session: Session):
+    account = AccountFactory()
+    category = CategoryFactory()
+    currency = CurrencyFactory()
+    batch = [
+        _build_stored_details(account, category, currency, entry_num=3)
+        for _ in range(5)
+    ]
+    assert validate_batch(session, batch) == []
+
+
+def test_validate_batch_errors(session: Session):
+    account = AccountFactory()
+    category = CategoryFactory()
+    currency = CurrencyFactory()
+    batch = [
+        _build_stored_details(account, category, currency, entry_num=3)
+        for _ in range(4)
+    ]
+    batch[1].transactions[-1].amount += 1
+    batch[2].transactions[0].account_id = account.id + 1
+    batch[3].entries[0].category_id = category.id + 1
+    batch[3].entries[0].currency_code = currency.code + "_INVALID"
+
+    errors = validate_batch(session, batch)
+    assert [error.index for error in errors] == [1, 2, 3, 3]
+    assert "do not match" in errors[0].detail
+    assert "Account id(s) not found" in errors[1].detail
+    assert "Category id(s) not found" in errors[2].detail
+    assert "Currency code(s) not found" in errors[3].detail
+
+
+def test_create_payments_detailed(session: Session):
+    accounts = AccountFactory.create_batch(2)
+    category = CategoryFactory()
+    currency = CurrencyFactory()
+    original_balances = {account.id: account.balance for account in accounts}
+    batch = [
+        _build_stored_details(
+            accounts[index % 2],
+            category,
+            currency,
+            type=PaymentType.Transfer,
+            entry_num=2,
+            transaction_num=2,
+        )
+        for index in range(6)
+    ]
+    # Keep amounts small, as SQLite stores decimals as floats
+    for index, details in enumerate(batch):
+        for entry in details.entries:
+            entry.amount = Decimal(index) / 4
+        for transaction in details.transactions:
+            transaction.amount = Decimal(-index) / 4
+
+    db_payments = create_payments_detailed(session, batch)
+    session.commit()
+
+    assert len(db_payments) == 6
+    for db_payment, details in zip(db_payments, batch, strict=True):
+        db_payment = read_payment(session, db_payment.id)
+        assert db_payment.description == details.payment.description
+        assert [entry.index for entry in db_payment.entries] == [0, 1]
+        assert [txn.index for txn in db_payment.transactions] == [0, 1]
+        for db_entry, entry in zip(db_payment.entries, details.entries, strict=True):
+            assert db_entry.amount == entry.amount
+        for db_txn, txn in zip(
+            db_payment.transactions, details.transactions, strict=True
+        ):
+            assert db_txn.amount == txn.amount
+
+    for account in accounts:
+        total_amount = sum(
+            txn.amount
+            for details in batch
+            for txn in details.transactions
+            if txn.account_id == account.id
+        )
+        db_account = read_account(session, account.id)
+        assert db_account.balance == original_balances[account.id] + total_amount
+
+
+def test_import_payments(session: Session):
+    account = AccountFactory()
+    category = CategoryFactory()
+    currency = CurrencyFactory()
+    lines = [
+        _build_stored_details(account, category, currency, entry_num=2)
+        .model_dump_json()
+        .encode()
+        for _ in range(5)
+    ]
+    mismatched = _build_stored_details(account, category, currency)
+    mismatched.transactions[0].amount += 1
+    lines.insert(1, b"{not json")
+    lines.insert(3, b"")
+    lines.insert(4, mismatched.model_dump_json().encode())
+
+    progresses = [
+        progress.model_copy(deep=True)
+        for progress in import_payments(session, lines, chunk_size=2)
+    ]
+
+    assert len(progresses) == 4  # 7 non-empty lines in chunks of 2
+    assert [progress.imported for progress in progresses] == [1, 2, 4, 5]
+    progress = progresses[-1]
+    assert progress.lines == 8
+    assert progress.failed == 2
+    assert [error.line for error in progress.errors] == [2, 5]
+    assert "do not match" in progress.errors[1].detail
+    assert len(read_payments(session)) == 5
+
+
+def _monthly_flows(session: Session) -> tuple[set[tuple], set[tuple]]:
+    return (
+        {
+            (flow.month, flow.category_id, flow.currency_code, flow.type)
+            + (flow.amount, flow.count)
+            for flow in read_monthly_category_flows(session)
+        },
+        {
+            (flow.month, flow.account_id, flow.type, flow.amount, flow.count)
+            for flow in read_monthly_account_flows(session)
+        },
+    )
+
+
+def _assert_monthly_flows_rebuilt(session: Session) -> None:
+    """Incrementally maintained flows match the ones recomputed from payments"""
+    flows = _monthly_flows(session)
+    rebuild_monthly_flows(session)
+    assert _monthly_flows(session) == flows
+
+
+def test_monthly_flows(session: Session):
+    accounts = AccountFactory.create_batch(2)
+    category = CategoryFactory()
+    currency = CurrencyFactory()
+    batch = [
+        _build_stored_details(accounts[index % 2], category, currency, entry_num=2)
+        for index in range(6)
+    ]
+    # Keep amounts small, as SQLite stores decimals as floats
+    for details in batch:
+        details.payment.type = PaymentType.Expense
+        for entry in details.entries:
+            entry.amount = Decimal(1) / 4
+            entry.quantity = 1
+        for transaction in details.transactions:
+            transaction.amount = Decimal(-1) / 2
+
+    db_payments = create_payments_detailed(session, batch)
+    session.commit()
+    category_flows, account_flows = _monthly_flows(session)
+    assert sum(flow[-1] for flow in category_flows) == 12
+    assert sum(flow[-1] for flow in account_flows) == 6
+    _assert_monthly_flows_rebuilt(session)
+
+    # Changing the type and time of a payment moves its flows
+    payment = PaymentRead.model_validate(
+        read_payment(session, db_payments[0].id),
+        update={"type": PaymentType.Income, "timestamp": datetime(2000, 1, 1)},
+    )
+    update_payment(session, payment)
+    session.commit()
+    category_flows, _ = _monthly_flows(session)
+    assert (date(2000, 1, 1), category.id, currency.code, PaymentType.Income) + (
+        Decimal(1) / 2,
+        2,
+    ) in category_flows
+    _assert_monthly_flows_rebuilt(session)
+
+    # Deleting a payment removes its flows and reverses its balance changes
+    balance = read_account(session, accounts[1].id).balance
+    delete_payment(session, db_payments[1].id)
+    session.commit()
+    assert read_payment(session, db_payments[1].id) is None
+    assert read_account(session, accounts[1].id).balance == balance + Decimal(1) / 2
+    _, account_flows = _monthly_flows(session)
+    assert sum(flow[-1] for flow in account_flows) == 5
+    _assert_monthly_flows_rebuilt(session)
+
+
+def test_balance_history(session: Session):
+    account = AccountFactory()
+    category = CategoryFactory()
+    currency = CurrencyFactory()
+    days = [date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 3), date(2024, 2, 5)]
+    batch = []
+    for day in days:
+        details = _build_stored_details(account, category, currency)
+        details.payment.type = PaymentType.Expense
+        details.entries[0].amount = Decimal(1) / 4
+        details.entries[0].quantity = 1
+        details.transactions[0].amount = Decimal(-1) / 4
+        details.transactions[0].timestamp = datetime.combine(day, datetime.min.time())
+        batch.append(details)
+    db_payments = create_payments_detailed(session, batch)
+    session.commit()
+    # Balances are the sums of the transactions, which a drifted stored balance of
+    # the account doesn't shift
+    account.balance += Decimal(100)
+    session.commit()
+    balance = Decimal(-1)
+
+    history = read_balance_history(
+        session, account.id, date(2024, 1, 1), date(2024, 1, 4)
+    )
+    assert [(point.start, point.balance) for point in history] == [
+        (date(2024, 1, 1), balance + Decimal(3) / 4),
+        (date(2024, 1, 2), balance + Decimal(3) / 4),
+        (date(2024, 1, 3), balance + Decimal(1) / 4),
+        (date(2024, 1, 4), balance + Decimal(1) / 4),
+    ]
+
+    # Periods are labeled with their first day, `start` defaults to the first change
+    history = read_balance_history(
+        session, account.id, end=date(2024, 2, 29), granularity="month"
+    )
+    assert [(point.start, point.balance) for point in history] == [
+        (date(2024, 1, 1), balance + Decimal(1) / 4),
+        (date(2024, 2, 1), balance),
+    ]
+    history = read_balance_history(
+        session, account.id, date(2024, 1, 2), date(2024, 1, 10), granularity="week"
+    )
+    assert [(point.start, point.balance) for point in history] == [
+        (date(2024, 1, 1), balance + Decimal(1) / 4),
+        (date(2024, 1, 8), balance + Decimal(1) / 4),
+    ]
+
+    # Deleting a payment subtracts its changes, as a rebuild from transactions does
+    delete_payment(session, db_payments[1].id)
+    session.commit()
+    history = read_balance_history(session, account.id, date(2024, 1, 1))
+    rebuild_daily_changes(session)
+    assert read_balance_history(session, account.id, date(2024, 1, 1)) == history
+    assert history[2].balance == history[0].balance - Decimal(1) / 4
+
+    # Long ranges are rejected, without a start they are cut to the maximum
+    with pytest.raises(ValueError, match="points requested"):
+        read_balance_history(session, account.id, date(1, 1, 1), date(2024, 1, 1))
+    history = read_balance_history(session, account.id, end=date(2040, 1, 1))
+    assert len(history) == HISTORY_POINTS_MAX
+    assert history[0].balance == balance + Decimal(1) / 4
+    assert history[-1].start == date(2040, 1, 1)
+
+
+def _assert_running_balances(session: Session, account_id: int) -> None:
+    """Stored running balances match the sums of the transactions up to each one"""
+    session.expire_all()
+    total = Decimal(0)
+    for txn in get_transactions(session, account_id=account_id):
+        total += txn.amount
+        assert txn.running_balance == total
+    assert read_account(session, account_id).balance == total
+
+
+def test_running_balances_interleaved(session: Session):
+    accounts = AccountFactory.create_batch(2, balance=Decimal(0))
+    category = CategoryFactory()
+    currency = CurrencyFactory()
+
+    def create(account_index: int, day: int, quarters: int) -> int:
+        details = _build_stored_details(accounts[account_index], category, currency)
+        details.payment.type = PaymentType.Expense
+        details.entries[0].amount = Decimal(quarters) / 4
+        details.entries[0].quantity = 1
+        details.transactions[0].amount = Decimal(-quarters) / 4
+        details.transactions[0].timestamp = datetime(2024, 1, day)
+        payment_id = create_payments_detailed(session, [details])[0].id
+        session.commit()
+        return payment_id
+
+    # Appended, backdated and same-time payments on both accounts, with deletes
+    # in between
+    payment_ids = [create(0, 10, 1), create(1, 5, 2), create(0, 3, 3)]
+    delete_payment(session, payment_ids[0])
+    session.commit()
+    payment_ids += [create(0, 3, 4), create(1, 1, 5), create(0, 20, 6)]
+    delete_payment(session, payment_ids[2])
+    session.commit()
+    payment_ids += [create(0, 2, 7), create(1, 5, 8)]
+    delete_payment(session, payment_ids[4])
+    session.commit()
+
+    for account in accounts:
+        _assert_running_balances(session, account.id)
+    assert len(get_transactions(session, account_id=accounts[0].id)) == 3
+
+
+def test_balance_history_not_found(session: Session):
+    with pytest.raises(ValueError, match="Account not found"):
+        read_balance_history(session, 1)
+
+
+def test_update_delete_payment_not_found(session: Session):
+    with pytest.raises(ValueError):
+        update_payment(session, PaymentRead.model_validate(PaymentFactory.build(id=1)))
+    with pytest.raises(ValueError):
+        delete_payment(session, 1)
@@ -0,0 +1,169 @@
+import json
+from collections.abc import Iterator
+from decimal import Decimal
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from kayman.schemas import Account, Category
+from kayman.tests.factories import AccountFactory, CategoryFactory
+from kayman.util import PAGE_SIZE_DEFAULT
+
+
+@pytest.fixture(scope="function")
+def account() -> Account:
+    return AccountFactory.create(balance=Decimal(0))
+
+
+@pytest.fixture(scope="function")
+def category() -> Category:
+    return CategoryFactory.create()
+
+
+def _expense(account: Account, category: Category, amount: str) -> dict[str, Any]:
+    return {
+        "payment": {
+            "type": "Expense",
+            "timestamp": "2024-01-02T08:00:00+08:00",
+            "timezone": "Asia/Taipei",
+        },
+        "transactions": [
+            {
+                "account_id": account.id,
+                "amount": f"-{amount}",
+                "timestamp": "2024-01-02T08:00:00+08:00",
+                "timezone": "Asia/Taipei",
+            }
+        ],
+        "entries": [
+            {
+                "category_id": category.id,
+                "amount": amount,
+                "quantity": 1,
+                "currency_code": account.currency_code,
+            }
+        ],
+    }
+
+
+def _read_balance(client: TestClient, account: Account) -> Decimal:
+    response = client.get(f"/accounts/{account.id}")
+    assert response.status_code == 200
+    return Decimal(str(response.json()["balance"]))
+
+
+def test_create_payment(api_client: TestClient, account: Account, category: Category):
+    response = api_client.post("/payments", json=_expense(account, category, "12.5"))
+    assert response.status_code == 200
+    payment = response.json()
+    assert payment["type"] == "Expense"
+    assert [Decimal(str(txn["amount"])) for txn in payment["transactions"]] == [
+        Decimal("-12.5")
+    ]
+    assert [entry["category_id"] for entry in payment["entries"]] == [category.id]
+    assert _read_balance(api_client, account) == Decimal("-12.5")
+
+    # Totals not matching
+    body = _expense(account, category, "12.5")
+    body["entries"][0]["amount"] = "10"
+    assert api_client.post("/payments", json=body).status_code == 400
+    assert _read_balance(api_client, account) == Decimal("-12.5")
+
+
+def test_read_payments(api_client: TestClient, account: Account, category: Category):
+    created = [
+        api_client.post("/payments", json=_expense(account, category, amount)).json()
+        for amount in ("1", "2", "3")
+    ]
+
+    response = api_client.get(f"/payments/{created[1]['id']}")
+    assert response.status_code == 200
+    assert response.json()["id"] == created[1]["id"]
+    assert api_client.get("/payments/0").status_code == 404
+
+    response = api_client.get("/payments", params={"payment_date": "2024-01-02"})
+    assert response.status_code == 200
+    assert [payment["id"] for payment in response.json()] == [
+        payment["id"] for payment in created
+    ]
+
+    # Pages follow the cursor
+    response = api_client.get("/payments", params={"limit": 2})
+    assert [payment["id"] for payment in response.json()] == [
+        payment["id"] for payment in created[:2]
+    ]
+    cursor = response.headers["X-Next-Cursor"]
+    response = api_client.get("/payments", params={"limit": 2, "cursor": cursor})
+    assert [payment["id"] for payment in response.json()] == [created[2]["id"]]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_read_payments_of_busy_day(
+    api_client: TestClient, account: Account, category: Category
+):
+    batch = [_expense(account, category, "1")] * (PAGE_SIZE_DEFAULT + 1)
+    assert api_client.post("/payments/batch", json=batch).status_code == 200
+
+    # Payments of a busy date are paginated as well, the cursor reads the rest
+    params = {"payment_date": "2024-01-02"}
+    response = api_client.get("/payments", params=params)
+    assert len(response.json()) == PAGE_SIZE_DEFAULT
+    cursor = response.headers["X-Next-Cursor"]
+    response = api_client.get("/payments", params=params | {"cursor": cursor})
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_update_payment(api_client: TestClient, account: Account, category: Category):
+    payment = api_client.post("/payments", json=_expense(account, category, "5")).json()
+
+    update = {key: payment[key] for key in ("id", "type", "timestamp", "timezone")} | {
+        "description": "Updated"
+    }
+    response = api_client.patch("/payments", json=update)
+    assert response.status_code == 200
+    assert response.json()["description"] == "Updated"
+    response = api_client.get(f"/payments/{payment['id']}")
+    assert response.json()["description"] == "Updated"
+
+    assert api_client.patch("/payments", json=update | {"id": 0}).status_code == 404
+
+
+def test_delete_payment(api_client: TestClient, account: Account, category: Category):
+    kept = api_client.post("/payments", json=_expense(account, category, "2")).json()
+    deleted = api_client.post("/payments", json=_expense(account, category, "3")).json()
+    assert _read_balance(api_client, account) == Decimal(-5)
+
+    assert api_client.delete(f"/payments/{deleted['id']}").status_code == 200
+    assert api_client.get(f"/payments/{deleted['id']}").status_code == 404
+    assert api_client.get(f"/payments/{kept['id']}").status_code == 200
+    assert _read_balance(api_client, account) == Decimal(-2)
+
+    assert api_client.delete(f"/payments/{deleted['id']}").status_code == 404
+
+
+def test_import_payments(api_client: TestClient, account: Account, category: Category):
+    lines = [json.dumps(_expense(account, category, str(n))) for n in range(1, 6)]
+    lines.insert(2, "not json")
+    lines.insert(4, "")
+    body = "\n".join(lines).encode()
+
+    def blocks() -> Iterator[bytes]:
+        # Lines span several blocks of the streamed body
+        for start in range(0, len(body), 64):
+            yield body[start : start + 64]
+
+    response = api_client.post(
+        "/payments/import", params={"chunk_size": 2}, content=blocks()
+    )
+    assert response.status_code == 200
+    progress = response.json()
+    assert progress["lines"] == 7
+    assert progress["imported"] == 5
+    assert progress["failed"] == 1
+    assert [error["line"] for error in progress["errors"]] == [3]
+
+    payments = api_client.get("/payments").json()
+    assert len(payments) == 5
+    assert _read_balance(api_client, account) == Decimal(-15)
@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from kayman.tests.factories import AccountFactory, TransactionFactory
+from kayman.util import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+
+def test_read_transactions_paginated(api_client: TestClient):
+    account = AccountFactory.create()
+    TransactionFactory.create_batch(
+        PAGE_SIZE_DEFAULT + 1,
+        account=account,
+        amount=Decimal(1),
+    )
+
+    # Pages have the same default size as payments, the cursor reads the rest
+    response = api_client.get("/transactions", params={"account_id": account.id})
+    assert response.status_code == 200
+    assert len(response.json()) == PAGE_SIZE_DEFAULT
+    cursor = response.headers["X-Next-Cursor"]
+    response = api_client.get(
+        "/transactions", params={"account_id": account.id, "cursor": cursor}
+    )
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+    # Every paginated endpoint caps the page size alike
+    for path in ("/payments", "/transactions", "/transactions/unreconciled"):
+        response = api_client.get(path, params={"limit": PAGE_SIZE_MAX + 1})
+        assert response.status_code == 422
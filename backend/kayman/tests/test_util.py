@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from kayman.cli import main
+from kayman.main import app
+from kayman.util import build_openapi, custom_openapi, split_lines
+
+
+def test_openapi_command(tmp_path: Path):
+    output = tmp_path / "openapi.json"
+    main(["openapi", str(output)])
+    schema = json.loads(output.read_text())
+
+    operation = schema["paths"]["/payments"]["post"]
+    assert operation["operationId"] == "Create Payment"
+    assert operation["requestBody"]["content"]["application/json"]["examples"]
+    # The application keeps serving its own operation ids
+    served = build_openapi(app)["paths"]["/payments"]["post"]
+    assert served["operationId"] == "Payment-Create Payment"
+
+
+def test_custom_openapi_frozen(tmp_path: Path):
+    frozen = tmp_path / "openapi.json"
+    frozen.write_text(json.dumps({"openapi": "3.1.0", "paths": {}}))
+    frozen_app = FastAPI()
+
+    assert custom_openapi(frozen_app, frozen) == {"openapi": "3.1.0", "paths": {}}
+    assert frozen_app.openapi_schema is not None
+
+
+def test_split_lines():
+    blocks = [b'{"a": 1}\n{"b"', b"", b": 2", b"}\n\n", b"last"]
+    assert list(split_lines(blocks)) == [b'{"a": 1}', b'{"b": 2}', b"", b"last"]
+    assert list(split_lines([b"one\n", b"two\n"])) == [b"one", b"two"]
+    assert list(split_lines([])) == []
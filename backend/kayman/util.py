@@ -1,22 +1,160 @@
-from datetime import datetime
-from typing import Any
+import base64
+import copy
+import json
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Sequence
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Annotated, Any, Protocol, TypeVar
 from zoneinfo import ZoneInfo
 
-import simplejson
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import FastAPI, Query, Response
+from fastapi.openapi.models import Example
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.routing import APIRoute
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 1000
+STREAM_BATCH_SIZE = 1000
+
+# Page size of every paginated endpoint, use with a default of PAGE_SIZE_DEFAULT
+PageLimit = Annotated[
+    int,
+    Query(ge=1, le=PAGE_SIZE_MAX, description="Rows per page, 100 by default"),
+]
+
+
+class KeysetRow(Protocol):
+    timestamp: datetime
+    id: int | None
+
+
+KeysetRowT = TypeVar("KeysetRowT", bound=KeysetRow)
+ExamplesBuilder = Callable[[], dict[str, Example]]
+
+# Request body examples are only needed in the OpenAPI document, so they are
+# built when the document is generated instead of when routers are imported
+REQUEST_EXAMPLES: dict[str, ExamplesBuilder] = {}
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+def request_examples(
+    tag: str, name: str
+) -> Callable[[ExamplesBuilder], ExamplesBuilder]:
+    """Register the request body examples of the route with `tag` and `name`"""
+
+    def register(builder: ExamplesBuilder) -> ExamplesBuilder:
+        REQUEST_EXAMPLES[f"{tag}-{name}"] = builder
+        return builder
+
+    return register
+
+
+def build_openapi(app: FastAPI) -> dict[str, Any]:
+    """Generate the OpenAPI document with the registered request body examples"""
+    schema = FastAPI.openapi(app)
+    for path in schema.get("paths", {}).values():
+        for operation in path.values():
+            builder = REQUEST_EXAMPLES.get(operation.get("operationId"))
+            if builder is None or "requestBody" not in operation:
+                continue
+            content = operation["requestBody"]["content"]["application/json"]
+            content["examples"] = builder()
+    return schema
+
+
+def convert_openapi(schema: dict[str, Any]) -> dict[str, Any]:
+    """Remove the tag prefix of operation ids, naming the generated client methods
+
+    Reference:
+    https://fastapi.tiangolo.com/advanced/generate-clients/#preprocess-the-openapi-specification-for-the-client-generator
+    """
+    schema = copy.deepcopy(schema)
+    for path in schema["paths"].values():
+        for operation in path.values():
+            prefix = f"{operation['tags'][0]}-"
+            operation["operationId"] = operation["operationId"].removeprefix(prefix)
+    return schema
+
+
+def custom_openapi(app: FastAPI, frozen: Path | None = None) -> dict[str, Any]:
+    """Return the OpenAPI document, read from `frozen` when it was built ahead"""
+    if app.openapi_schema:
+        return app.openapi_schema
+    if not frozen:
+        return build_openapi(app)
+    schema: dict[str, Any] = json.loads(frozen.read_bytes())
+    app.openapi_schema = schema
+    return schema
+
+
+def encode_cursor(timestamp: datetime, id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        timestamp, id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(timestamp), int(id)
+    except (ValueError, TypeError) as err:
+        raise ValueError(f"Invalid cursor: {cursor}") from err
+
+
+def split_lines(blocks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Split a stream of byte blocks into lines, without their line breaks
+
+    A line spanning several blocks is kept as a list of parts and joined once, so
+    splitting takes time linear in the size of the stream.
+    """
+    parts: list[bytes] = []
+    for block in blocks:
+        *lines, rest = block.split(b"\n")
+        if lines:
+            parts.append(lines[0])
+            yield b"".join(parts)
+            yield from lines[1:]
+            parts = []
+        if rest:
+            parts.append(rest)
+    if parts:
+        yield b"".join(parts)
+
+
+def paginate(
+    response: Response, rows: Sequence[KeysetRowT], limit: int
+) -> Sequence[KeysetRowT]:
+    """
+    Trim a page queried with `limit + 1` rows, and advertise the cursor of the
+    next page in the response header if there is one.
+    """
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    last = rows[-1]
+    if last.id is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.timestamp, last.id)
+    return rows
+
+
 def handle_special_types(obj: Any) -> Any:
-    print(f"handled type: {type(obj)}, {obj=}")
+    if isinstance(obj, Decimal):
+        if not obj.is_finite():
+            raise ValueError(f"Out of range decimal value: {obj}")
+        return orjson.Fragment(str(obj))
     if isinstance(obj, BaseModel):
-        return obj.dict()
-    if isinstance(obj, datetime):
+        return obj.model_dump()
+    if isinstance(obj, datetime | date | time):
         return obj.isoformat()
     if isinstance(obj, ZoneInfo):
         return str(obj)
@@ -31,15 +169,57 @@ class KustomJSONResponse(JSONResponse):
     - decimal.Decimal: unlimited precision
     - datetime.datetime: format with dt.isoformat()
     - zoneinfo.ZoneInfo: format with str(zoneinfo.ZoneInfo)
+
+    Rendered with orjson, which calls `handle_special_types` only for the types
+    above. Datetimes and dataclasses are passed through so they are formatted
+    the same way as other unknown types.
     """
 
     def render(self, content: Any) -> bytes:
-        return simplejson.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-            default=handle_special_types,
-            use_decimal=True,
-        ).encode("utf-8")
+        return render_json(content)
+
+
+def render_json(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=handle_special_types,
+        option=orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+
+
+def stream_json_array(
+    session: AsyncSession,
+    statement: SelectOfScalar[Any],
+    response_model: type[BaseModel],
+) -> StreamingResponse:
+    """
+    Stream the rows selected by `statement` as a JSON array of `response_model`
+
+    Rows are fetched `STREAM_BATCH_SIZE` at a time and every batch is written as it
+    is read, so memory use doesn't grow with the number of rows. The response is
+    rendered the same way as a non streamed response.
+
+    The request session is closed before the response body is sent, so rows are
+    read with a new session on the same database.
+    """
+    bind = session.bind
+    adapter: TypeAdapter[BaseModel] = TypeAdapter(response_model)
+
+    def render_row(row: Any) -> bytes:
+        model = adapter.validate_python(row, from_attributes=True)
+        return render_json(adapter.dump_python(model, mode="json"))
+
+    async def generate() -> AsyncIterator[bytes]:
+        async with AsyncSession(bind) as stream_session:
+            rows = await stream_session.stream_scalars(
+                statement, execution_options={"yield_per": STREAM_BATCH_SIZE}
+            )
+            separator = b"["
+            async for batch in rows.partitions():
+                yield separator + b",".join(render_row(row) for row in batch)
+                separator = b","
+            yield b"]" if separator == b"," else b"[]"
+
+    return StreamingResponse(generate(), media_type="application/json")
@@ -4,14 +4,11 @@ set -euo pipefail
 
 TMP_FILE="$(mktemp)"
 
-# Download openapi.json
-wget 'http://localhost:8000/openapi.json' -O "${TMP_FILE}"
-
 # Remove tmp file on exit
 trap 'rm -f "${TMP_FILE}"' EXIT
 
-# Convert openapi.json
-poetry run scripts/convert_openapi.py "${TMP_FILE}"
+# Build openapi.json, no running server is needed
+poetry run python -m kayman.cli openapi "${TMP_FILE}"
 
 # Generate client
 cd "../frontend"
@@ -0,0 +1,5 @@
+#!/usr/bin/env bash
+set -euo pipefail
+# Usage: poetry run scripts/import_payments.sh path/to/payments.ndjson [--chunk-size N]
+
+python -m kayman.cli import-payments "$@"
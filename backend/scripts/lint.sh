@@ -2,6 +2,6 @@
 set -euo pipefail
 # Usage: poetry run scripts/lint.sh
 
-mypy kayman
-ruff check kayman
-ruff format kayman --check
+mypy kayman benchmarks
+ruff check kayman benchmarks
+ruff format kayman benchmarks --check
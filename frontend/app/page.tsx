@@ -7,6 +7,9 @@ import { PaymentReadDetailed, readPayments } from "@/lib/client"
 import { useAuth } from "@/lib/context/AuthContext"
 import { useEffect, useState } from "react"
 
+// Response header with the cursor of the next page, lower-cased by axios
+const NEXT_CURSOR_HEADER = "x-next-cursor"
+
 export default function CalendarApp() {
   const { client } = useAuth()
   const { toast } = useToast()
@@ -23,17 +26,24 @@ export default function CalendarApp() {
     const payment_date = date?.toLocaleDateString("en-CA") // 2025-01-01
 
     async function fetchPayments() {
-      const response = await readPayments({
-        client,
-        query: { payment_date },
-      })
-      if (response.error) {
-        throw new Error("Failed to fetch payments")
-      }
-      if (!response.data) {
-        throw new Error("No data returned")
-      }
-      setPayments(response.data)
+      // Payments are paginated, follow the cursor until the last page
+      const dayPayments: PaymentReadDetailed[] = []
+      let cursor: string | undefined = undefined
+      do {
+        const response = await readPayments({
+          client,
+          query: { payment_date, cursor },
+        })
+        if (response.error) {
+          throw new Error("Failed to fetch payments")
+        }
+        if (!response.data) {
+          throw new Error("No data returned")
+        }
+        dayPayments.push(...response.data)
+        cursor = response.headers[NEXT_CURSOR_HEADER]
+      } while (cursor)
+      setPayments(dayPayments)
     }
 
     try {
@@ -45,8 +45,9 @@ export const AuthProvider = ({ children }: AuthContextProps) => {
   }, [])
 
   const login = async (host: string, username: string, password: string) => {
-    // Create a new client with the new config
-    const client = createClient({ baseURL: host })
+    // Create a new client with the new config. Credentials are sent, so the API
+    // can pin reads after a write to the primary database with its cookie
+    const client = createClient({ baseURL: host, withCredentials: true })
 
     // Try to authenticate with the new config
     const response = await clientLogin({
@@ -66,6 +67,7 @@ export const AuthProvider = ({ children }: AuthContextProps) => {
     // Set the new config
     client.setConfig({
       baseURL: host,
+      withCredentials: true,
       auth: () => response.data.access_token,
     })
 